@@ -0,0 +1,158 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+# ==========================================
+# 📦 CLASSIFICATION MICRO-BATCHING
+# Concurrent classification requests in a worker are collected for up to
+# BATCH_WINDOW_MS (or BATCH_MAX_SIZE items) and sent to Gemini as one prompt.
+# Answers are matched to requests by their item number; any request the
+# batch didn't answer falls back to its own single call.
+# ==========================================
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", 25))   # 0 disables batching
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 16))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))  # batches in flight per worker
+
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class ClassificationBatcher:
+    def __init__(self, send_batch, send_one, window_ms=BATCH_WINDOW_MS,
+                 max_size=BATCH_MAX_SIZE, concurrency=BATCH_CONCURRENCY):
+        # send_batch(texts) -> list of results, each carrying the 1-based "item" it answers;
+        #                      raises or returns junk on failure
+        # send_one(text) -> result
+        self.send_batch = send_batch
+        self.send_one = send_one
+        self.window = window_ms / 1000.0
+        self.max_size = max_size
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+        self._pool = None
+        self._stats = {"batches": 0, "items": 0, "fallbacks": 0,
+                       "wait_seconds_sum": 0.0, "wait_seconds_max": 0.0,
+                       "size_buckets": {bucket: 0 for bucket in SIZE_BUCKETS}}
+
+    def _ensure_started(self):
+        with self._lock:
+            # Dispatcher thread is started lazily so each forked worker gets its own.
+            if self._queue is not None and self._pid == os.getpid():
+                return self._queue
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="classify-batch")
+            threading.Thread(target=self._dispatch, args=(self._queue,), name="classify-batcher", daemon=True).start()
+            return self._queue
+
+    def classify(self, text):
+        if self.window <= 0 or self.max_size <= 1:
+            return self.send_one(text)
+        future = Future()
+        self._ensure_started().put((text, time.monotonic(), future))
+        result = future.result()
+        # None means the batch didn't answer this item; classify it alone.
+        return self.send_one(text) if result is None else result
+
+    def classify_many(self, texts):
+        # Queue all texts at once so they fill whole batches. Items a batch couldn't
+        # answer are classified alone; a failed single call comes back as the exception.
+        if self.window <= 0 or self.max_size <= 1:
+            results = [None] * len(texts)
+        else:
+            pending = self._ensure_started()
+            futures = []
+            for text in texts:
+                futures.append(Future())
+                pending.put((text, time.monotonic(), futures[-1]))
+            results = [future.result() for future in futures]
+
+        for i, result in enumerate(results):
+            if result is None:
+                try:
+                    results[i] = self.send_one(texts[i])
+                except Exception as e:
+                    results[i] = e
+        return results
+
+    def _dispatch(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = batch[0][1] + self.window
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._record(batch)
+            self._pool.submit(self._send, batch)
+
+    def _send(self, batch):
+        texts = [text for text, _, _ in batch]
+        results = None
+        if len(batch) == 1:
+            results = [None]  # nothing to batch, caller makes the normal call
+        else:
+            try:
+                results = self.match_items(self.send_batch(texts), len(batch))
+            except Exception as e:
+                print(f"Batch of {len(batch)} failed, falling back to single calls: {e}")
+                results = [None] * len(batch)
+            if None in results:
+                with self._lock:
+                    self._stats["fallbacks"] += 1
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    @staticmethod
+    def match_items(answers, size):
+        # Place each answer by its item number, never by its position in the array.
+        # Missing, duplicate or out-of-range numbers leave that slot None.
+        if not isinstance(answers, list):
+            raise ValueError(f"expected a list of {size} results")
+        results = [None] * size
+        seen = set()
+        for answer in answers:
+            item = answer.get("item") if isinstance(answer, dict) else None
+            if isinstance(item, bool) or not isinstance(item, int) or not 1 <= item <= size:
+                continue
+            if item in seen:
+                results[item - 1] = None
+            else:
+                results[item - 1] = {k: v for k, v in answer.items() if k != "item"}
+            seen.add(item)
+        return results
+
+    def _record(self, batch):
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats
+            stats["batches"] += 1
+            stats["items"] += len(batch)
+            for _, enqueued, _ in batch:
+                wait = now - enqueued
+                stats["wait_seconds_sum"] += wait
+                stats["wait_seconds_max"] = max(stats["wait_seconds_max"], wait)
+            bucket = next((b for b in SIZE_BUCKETS if len(batch) <= b), SIZE_BUCKETS[-1])
+            stats["size_buckets"][bucket] += 1
+        metrics.observe("society_batch_size", len(batch))
+        for _, enqueued, _ in batch:
+            metrics.observe("society_batch_wait_seconds", now - enqueued)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size_buckets=dict(self._stats["size_buckets"]))
+        stats["pid"] = os.getpid()
+        stats["window_ms"] = self.window * 1000
+        stats["max_size"] = self.max_size
+        stats["avg_batch_size"] = stats["items"] / stats["batches"] if stats["batches"] else 0.0
+        stats["avg_wait_seconds"] = stats["wait_seconds_sum"] / stats["items"] if stats["items"] else 0.0
+        return stats
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+
+from fake_genai import COMPLAINTS, FakeModel, install
+
+# Throughput of /tickets/bulk for 10k complaints versus one /upload_text per
+# complaint, against a throwaway database and a local stand-in for Gemini
+# (no API quota used).
+#
+#   python bench_bulk.py --items 10000 --llm-latency 0.2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk ticket ingestion")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--single-sample", type=int, default=300,
+                        help="complaints sent one by one through /upload_text for comparison")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake Gemini call")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ["RESULT_CACHE"] = "0"   # every run should pay for classification
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import server
+
+    fake = install(server, FakeModel(args.llm_latency))
+    client = server.app.test_client()
+    rng = random.Random(1)
+
+    def complaint():
+        return rng.choice(COMPLAINTS).format(n=rng.randint(1, 999))
+
+    body = "\n".join(json.dumps({"text": complaint()}) for _ in range(args.items)).encode()
+    start = time.perf_counter()
+    response = client.post("/tickets/bulk", data=body, content_type="application/x-ndjson")
+    elapsed = time.perf_counter() - start
+    result = response.get_json()
+    bulk_calls = fake.calls
+    print(f"📦 /tickets/bulk: {args.items} items in {elapsed:.2f}s "
+          f"= {args.items / elapsed:,.0f} items/s ({result['created']} created, {result['private']} private, "
+          f"{result['failed']} failed, {bulk_calls} Gemini calls)")
+
+    fake.calls = 0
+    start = time.perf_counter()
+    for _ in range(args.single_sample):
+        client.post("/upload_text", json={"text": complaint()})
+    elapsed = time.perf_counter() - start
+    rate = args.single_sample / elapsed
+    print(f"🐢 /upload_text: {args.single_sample} items in {elapsed:.2f}s = {rate:,.0f} items/s "
+          f"({fake.calls} Gemini calls) -> ~{args.items / rate:.0f}s for {args.items}")
+
+
+if __name__ == '__main__':
+    main()
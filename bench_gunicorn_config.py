@@ -0,0 +1,14 @@
+import os
+import sys
+
+# gunicorn_config.py plus a local Gemini stand-in in every worker, for
+# bench_load.py. Worker model and counts are overridden on the command line.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from gunicorn_config import *  # noqa: E402,F401,F403
+
+import fake_genai  # noqa: E402
+
+
+def post_worker_init(worker):
+    import server
+    fake_genai.install(server)
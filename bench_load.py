@@ -0,0 +1,276 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import importlib.util
+from collections import defaultdict, Counter
+from datetime import datetime, timezone
+
+from fake_genai import COMPLAINTS
+
+# Offline load test: boots the real gunicorn setup (bench_gunicorn_config.py,
+# which swaps in fake_genai) once per worker model, drives a mixed workload
+# at fixed concurrency and reports p50/p95/p99 latency, requests/s and SQLite
+# lock errors per endpoint. Results are saved as JSON so runs can be diffed.
+#
+#   python bench_load.py --duration 20 --concurrency 32
+#   python bench_load.py --models sync:2 gthread:2x16 gevent:2 --compare bench_results/load-<earlier>.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# endpoint -> share of the traffic
+WORKLOAD = {
+    "upload_text": 0.30,
+    "upload_audio": 0.10,
+    "tickets": 0.25,
+    "dashboard": 0.25,
+    "resolve": 0.10,
+}
+DEFAULT_MODELS = ["sync:2", "gthread:2x8", "gthread:4x8", "gevent:2"]
+SEED_TICKETS = 500
+
+
+def parse_model(spec):
+    # "sync:2" -> sync, 2 workers; "gthread:2x8" -> gthread, 2 workers, 8 threads each
+    worker_class, _, counts = spec.partition(":")
+    workers, _, threads = (counts or "2").partition("x")
+    return {"name": spec, "worker_class": worker_class, "workers": int(workers), "threads": int(threads or 1)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed_database(path, count):
+    sys.path.insert(0, HERE)
+    import ticket_store
+    ticket_store.init_db(path)
+    rng = random.Random(0)
+    ticket_store.create_tickets([("Plumbing", f"Issue: {rng.choice(COMPLAINTS).format(n=i)}", "Open", "llm")
+                                 for i in range(count)])
+    ticket_store.close()
+
+
+def start_server(model, port, db_path, log_path, args):
+    env = dict(os.environ, DB_PATH=db_path, GOOGLE_API_KEY="offline",
+               FAKE_GEMINI_LATENCY=str(args.latency), FAKE_GEMINI_JITTER=str(args.jitter),
+               FAKE_GEMINI_ERROR_RATE=str(args.error_rate))
+    command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(HERE, "bench_gunicorn_config.py"),
+               "--bind", f"127.0.0.1:{port}", "--worker-class", model["worker_class"],
+               "--workers", str(model["workers"]), "--threads", str(model["threads"]),
+               "--timeout", "120", "server:app"]
+    log = open(log_path, "w")
+    process = subprocess.Popen(command, cwd=HERE, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited early, see {log_path}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not come up, see {log_path}")
+
+
+def multipart(field, filename, payload):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: audio/mp4\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def make_request(endpoint, rng):
+    # Returns (method, path, body, headers)
+    if endpoint == "upload_text":
+        text = rng.choice(COMPLAINTS).format(n=rng.randint(1, 999))
+        return "POST", "/upload_text", json.dumps({"text": text}).encode(), {"Content-Type": "application/json"}
+    if endpoint == "upload_audio":
+        # A few distinct clips so the transcript cache sees both hits and misses
+        payload = rng.randint(0, 50).to_bytes(2, "big") * 4096
+        body, content_type = multipart("audio", "clip.m4a", payload)
+        return "POST", "/upload_audio", body, {"Content-Type": content_type}
+    if endpoint == "tickets":
+        return "GET", f"/tickets?limit={rng.choice([20, 50, 100])}", None, {}
+    if endpoint == "dashboard":
+        return "GET", "/dashboard", None, {}
+    return "POST", f"/resolve/{rng.randint(1, SEED_TICKETS)}", None, {}
+
+
+def drive(port, args):
+    endpoints, weights = zip(*WORKLOAD.items())
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    errors = Counter()
+    lock = threading.Lock()
+    start = time.perf_counter()
+    stop_at = start + args.duration
+
+    def client(n):
+        rng = random.Random(n)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while time.perf_counter() < stop_at:
+            endpoint = rng.choices(endpoints, weights)[0]
+            method, path, body, headers = make_request(endpoint, rng)
+            began = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                with lock:
+                    errors[type(e).__name__] += 1
+                continue
+            elapsed = time.perf_counter() - began
+            with lock:
+                latencies[endpoint].append(elapsed)
+                statuses[endpoint][status] += 1
+                if b"database is locked" in payload:
+                    errors["database is locked (response)"] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, statuses, errors, time.perf_counter() - start
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies, statuses, elapsed):
+    summary = {}
+    every = []
+    for endpoint in WORKLOAD:
+        values = latencies.get(endpoint, [])
+        every += values
+        summary[endpoint] = {
+            "requests": len(values),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "status": {str(k): v for k, v in sorted(statuses.get(endpoint, {}).items())},
+        }
+    summary["all"] = {
+        "requests": len(every),
+        "rps": round(len(every) / elapsed, 2),
+        "p50_ms": round(percentile(every, 50) * 1000, 2),
+        "p95_ms": round(percentile(every, 95) * 1000, 2),
+        "p99_ms": round(percentile(every, 99) * 1000, 2),
+    }
+    return summary
+
+
+def run_model(model, args, workdir):
+    if model["worker_class"] == "gevent" and importlib.util.find_spec("gevent") is None:
+        print(f"⏭️  {model['name']}: gevent is not installed, skipped")
+        return {"skipped": "gevent is not installed"}
+
+    db_path = os.path.join(workdir, f"{model['name'].replace(':', '_')}.db")
+    log_path = db_path.replace(".db", ".log")
+    seed_database(db_path, SEED_TICKETS)
+    port = free_port()
+    process = start_server(model, port, db_path, log_path, args)
+    try:
+        latencies, statuses, errors, elapsed = drive(port, args)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    with open(log_path) as f:
+        locked_in_log = f.read().count("database is locked")
+    summary = summarize(latencies, statuses, elapsed)
+    return {
+        "model": model,
+        "duration_s": round(elapsed, 2),
+        "endpoints": summary,
+        "sqlite_lock_errors": locked_in_log + errors.pop("database is locked (response)", 0),
+        "client_errors": dict(errors),
+        "log": log_path,
+    }
+
+
+def print_result(name, result, baseline=None):
+    if "skipped" in result:
+        return
+    print(f"\n🏁 {name}: {result['endpoints']['all']['rps']} req/s, "
+          f"SQLite lock errors: {result['sqlite_lock_errors']}, client errors: {result['client_errors'] or 0}")
+    print(f"   {'endpoint':<13}{'reqs':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status")
+    for endpoint, stats in result["endpoints"].items():
+        line = (f"   {endpoint:<13}{stats['requests']:>7}{stats['rps']:>9}{stats['p50_ms']:>10}"
+                f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}  {stats.get('status', '')}")
+        old = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if old and old["p95_ms"] and old["rps"]:
+            line += (f"  Δp95 {100 * (stats['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.0f}%"
+                     f"  Δreq/s {100 * (stats['rps'] - old['rps']) / old['rps']:+.0f}%")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against gunicorn with a fake Gemini")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS,
+                        help="worker setups, e.g. sync:2 gthread:2x8 gevent:4")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15, help="seconds per worker setup")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake Gemini seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--output", default=None, help="result file (default bench_results/load-<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier result file to diff against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    workdir = tempfile.mkdtemp(prefix="society-bench-")
+    results = {}
+    for spec in args.models:
+        model = parse_model(spec)
+        print(f"🚀 {spec}: {args.concurrency} clients for {args.duration:g}s "
+              f"(fake Gemini {args.latency}s ±{args.jitter}s, {args.error_rate:.0%} errors)")
+        results[spec] = run_model(model, args, workdir)
+        print_result(spec, results[spec], baseline.get(spec))
+
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                  capture_output=True, text=True).stdout.strip()
+    except OSError:
+        revision = ""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = args.output or os.path.join(HERE, "bench_results", f"load-{stamp}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"timestamp": stamp, "git_revision": revision,
+                   "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+                   "workload": WORKLOAD, "results": results}, f, indent=2)
+    print(f"\n💾 Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import re
+import json
+import codecs
+from itertools import islice
+
+# ==========================================
+# 📥 BULK INGESTION HELPERS
+# Streaming parsers for /tickets/bulk: items are decoded as the body is read,
+# so a 10k-complaint upload never sits in memory as one string.
+# ==========================================
+READ_SIZE = 64 * 1024
+MAX_ITEM_BYTES = 64 * 1024   # a single complaint larger than this is rejected
+
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class BulkParseError(ValueError):
+    pass
+
+
+def iter_ndjson(stream):
+    # One JSON value per line; blank lines are skipped. Lines are independent, so a
+    # bad one is yielded as a BulkParseError item (reported per item) and reading goes on.
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_ITEM_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > MAX_ITEM_BYTES:
+            while line and not line.endswith(b"\n"):  # skip the rest of it
+                line = stream.readline(MAX_ITEM_BYTES + 1)
+            yield BulkParseError(f"Line {line_number} is larger than {MAX_ITEM_BYTES} bytes")
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield BulkParseError(f"Line {line_number}: {e}")
+
+
+def iter_json_array(stream):
+    # Incremental parse of "[item, item, ...]": raw_decode at a moving offset into a
+    # buffer that is only compacted when more of the body is read.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()  # chunks may split a multi-byte character
+    buffer, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(READ_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + utf8.decode(chunk or b"", final=eof)
+        pos = 0
+
+    def next_char():
+        # First non-whitespace character at pos (reading more as needed), or "" at the end.
+        nonlocal pos
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    if next_char() != "[":
+        raise BulkParseError("Expected a JSON array")
+    pos += 1
+
+    expect_item = None  # None: item or ']', True: item (after a comma), False: ',' or ']'
+    while True:
+        char = next_char()
+        if not char:
+            raise BulkParseError("Unexpected end of JSON array")
+        if expect_item is not True and char == "]":
+            return
+        if expect_item is False:
+            if char != ",":
+                raise BulkParseError("Expected ',' or ']' between items")
+            pos += 1
+            expect_item = True
+            continue
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except ValueError as e:
+                # Probably cut off mid-item: read more, unless there is no more to read.
+                if eof or len(buffer) - pos > MAX_ITEM_BYTES:
+                    raise BulkParseError(f"Invalid JSON array item: {e}")
+                fill()
+                continue
+            # A number or literal at the end of the buffer may still be growing.
+            if end == len(buffer) and not eof and not isinstance(item, (dict, list, str)):
+                fill()
+                continue
+            break
+        pos = end
+        expect_item = False
+        yield item
+
+
+def stop_at_error(items, errors):
+    # Ends the iteration at a BulkParseError (appended to `errors`) instead of raising,
+    # so the items parsed before it are still processed.
+    try:
+        yield from items
+    except BulkParseError as e:
+        errors.append(e)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
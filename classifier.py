@@ -0,0 +1,215 @@
+import os
+import re
+import math
+import time
+import threading
+from collections import Counter, defaultdict
+
+import ticket_store
+
+# ==========================================
+# 🧮 TIERED CLASSIFIER
+# Tier 1: compiled keyword matcher (privacy rule + category keywords)
+# Tier 2: naive Bayes trained on stored tickets
+# Tier 3: Gemini (in server.py) - only reached when both tiers are unsure.
+# Every decision carries the tier that made it and its confidence.
+# ==========================================
+# One keyword hit scores 0.75 and two agreeing hits 1.0, so the default only lets
+# corroborated matches through: a lone "smell" or "alarm" is too often incidental.
+# evaluate_classifier.py on 56 hand-labelled complaints: 0.75 -> 86% coverage at 90%
+# accuracy, 0.8 -> 45% coverage at 96% accuracy.
+KEYWORD_THRESHOLD = float(os.environ.get("KEYWORD_THRESHOLD", 0.8))
+MODEL_THRESHOLD = float(os.environ.get("MODEL_THRESHOLD", 0.9))
+MIN_EXAMPLES_PER_CATEGORY = int(os.environ.get("MIN_EXAMPLES_PER_CATEGORY", 5))
+RETRAIN_INTERVAL = int(os.environ.get("CLASSIFIER_RETRAIN_INTERVAL", 600))
+TRAINING_LIMIT = 5000
+
+TIER_PRIVATE = "private"
+TIER_KEYWORD = "keyword"
+TIER_MODEL = "model"
+TIER_CACHE = "cache"
+TIER_LLM = "llm"
+TIER_FALLBACK = "fallback"
+
+# Tickets whose category came from Gemini (or predate tiers) are the training labels;
+# training on our own local guesses would just reinforce them.
+TRUSTED_TIERS = (TIER_LLM, TIER_CACHE)
+
+# The baseline list plus the forms SUFFIXES can't build from it: the old substring
+# check caught "phoned" and "messaged", and a word-boundary match must too.
+PRIVATE_KEYWORDS = ["call", "phone", "phoned", "phoning", "telephone", "telephoned",
+                    "message", "messaged", "messaging", "contact", "connect",
+                    "ring", "rang", "rung", "talk to", "talks to", "talked to", "talking to"]
+
+CATEGORY_KEYWORDS = {
+    "Plumbing": ["leak", "water", "pipe", "tap", "drain", "flush", "toilet", "sink", "plumb",
+                 "clog", "overflow", "seepage", "sewage", "tank", "shower"],
+    "Electrical": ["power", "electric", "electricity", "light", "bulb", "wire", "wiring", "switch",
+                   "socket", "fuse", "mcb", "short circuit", "spark", "fan", "voltage", "inverter",
+                   "generator", "outage"],
+    "Security": ["guard", "security", "thief", "theft", "stolen", "intruder", "stranger", "gate",
+                 "cctv", "camera", "trespass", "suspicious", "break-in", "alarm"],
+    "Cleaning": ["garbage", "trash", "dirt", "dust", "clean", "sweep", "litter", "smell", "stink",
+                 "waste", "dustbin", "mop", "pest", "cockroach", "rats", "rodent", "mice"],
+}
+
+STOPWORDS = {"the", "a", "an", "is", "are", "was", "in", "on", "at", "of", "to", "and", "or",
+             "my", "our", "there", "it", "this", "that", "from", "for", "with", "issue", "please"}
+
+
+# --- Tier 1: keyword matcher ---
+class KeywordMatcher:
+    # All keywords compiled into one alternation of named groups, so a single
+    # finditer pass counts hits per group; \b stops "ring" matching "during".
+    SUFFIXES = r"(?:s|es|ed|ing|age|y)?"
+
+    def __init__(self, groups):
+        parts = []
+        self.group_names = {}
+        for i, (name, words) in enumerate(groups.items()):
+            alternatives = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+            self.group_names[f"g{i}"] = name
+            parts.append(rf"(?P<g{i}>\b(?:{alternatives}){self.SUFFIXES}\b)")
+        self.pattern = re.compile("|".join(parts), re.IGNORECASE)
+
+    def count(self, text):
+        return Counter(self.group_names[m.lastgroup] for m in self.pattern.finditer(text))
+
+
+matcher = KeywordMatcher({TIER_PRIVATE: PRIVATE_KEYWORDS, **CATEGORY_KEYWORDS})
+
+
+def keyword_decision(text, hits):
+    hits = Counter({k: v for k, v in hits.items() if k != TIER_PRIVATE})
+    if not hits:
+        return None
+    category, top = hits.most_common(1)[0]
+    # Share of hits for the winning category, discounted when it rests on a single word.
+    confidence = (top / sum(hits.values())) * min(1.0, 0.5 + 0.25 * top)
+    return complaint(text, category, TIER_KEYWORD, confidence)
+
+
+# --- Tier 2: naive Bayes over stored tickets ---
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z]+", text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def strip_issue_prefix(description):
+    return re.sub(r"^\s*issue:\s*", "", description or "", flags=re.IGNORECASE)
+
+
+class NaiveBayes:
+    def __init__(self, samples):
+        # samples: [(category, text)]
+        self.doc_counts = Counter()
+        self.word_counts = defaultdict(Counter)
+        for category, text in samples:
+            self.doc_counts[category] += 1
+            self.word_counts[category].update(tokenize(text))
+        self.vocab = set().union(*self.word_counts.values()) if self.word_counts else set()
+        total_docs = sum(self.doc_counts.values())
+        self.log_prior = {c: math.log(n / total_docs) for c, n in self.doc_counts.items()}
+        self.log_denominator = {c: math.log(sum(self.word_counts[c].values()) + len(self.vocab) + 1)
+                                for c in self.doc_counts}
+
+    def predict(self, text):
+        tokens = [t for t in tokenize(text) if t in self.vocab]
+        if not tokens or not self.doc_counts:
+            return None, 0.0
+        scores = {}
+        for category in self.doc_counts:
+            counts = self.word_counts[category]
+            scores[category] = self.log_prior[category] + sum(
+                math.log(counts[t] + 1) - self.log_denominator[category] for t in tokens)
+        best = max(scores, key=scores.get)
+        # Posterior of the winner (softmax over the log scores)
+        total = sum(math.exp(s - scores[best]) for s in scores.values())
+        return best, 1.0 / total
+
+
+SELECT_SAMPLES = ("SELECT category, description FROM tickets "
+                  f"WHERE (tier IS NULL OR tier IN ({', '.join('?' for _ in TRUSTED_TIERS)})) "
+                  "AND category NOT IN ('General', 'Private') ORDER BY id DESC LIMIT ?")
+
+
+def load_training_samples(limit=TRAINING_LIMIT, conn=None):
+    # conn: read from this connection instead of the pool (evaluate_classifier.py opens one read-only)
+    if conn is not None:
+        rows = conn.execute(SELECT_SAMPLES, (*TRUSTED_TIERS, limit)).fetchall()
+    else:
+        with ticket_store.connection() as conn:
+            rows = conn.execute(SELECT_SAMPLES, (*TRUSTED_TIERS, limit)).fetchall()
+    return [(row[0], strip_issue_prefix(row[1])) for row in rows]
+
+
+def train_model(samples):
+    counts = Counter(category for category, _ in samples)
+    samples = [(c, t) for c, t in samples if counts[c] >= MIN_EXAMPLES_PER_CATEGORY]
+    if len({c for c, _ in samples}) < 2:
+        return None  # not enough history to tell categories apart
+    return NaiveBayes(samples)
+
+
+# --- Engine ---
+def complaint(text, category, tier, confidence):
+    return {"intent": "complaint", "category": category, "text": f"Issue: {text}",
+            "tier": tier, "confidence": round(confidence, 3)}
+
+
+def private_request(text):
+    # Extract target (simple logic: look for numbers like '101')
+    target = ''.join(filter(str.isdigit, text)) or "Security"
+    return {
+        "intent": "private",
+        "action": "call" if "mess" not in text.lower() else "message",
+        "target": target,
+        "text": text,
+        "category": "Private",
+        "tier": TIER_PRIVATE,
+        "confidence": 1.0,
+    }
+
+
+class TieredClassifier:
+    def __init__(self, keyword_threshold=KEYWORD_THRESHOLD, model_threshold=MODEL_THRESHOLD,
+                 retrain_interval=RETRAIN_INTERVAL):
+        self.keyword_threshold = keyword_threshold
+        self.model_threshold = model_threshold
+        self.retrain_interval = retrain_interval
+        self.model = None
+        self.trained_at = None
+        self._train_lock = threading.Lock()
+
+    def refresh_model(self, force=False):
+        if not force and self.trained_at is not None and time.time() - self.trained_at < self.retrain_interval:
+            return
+        # One thread retrains; the others keep using the previous model meanwhile.
+        if not self._train_lock.acquire(blocking=self.trained_at is None or force):
+            return
+        try:
+            self.model = train_model(load_training_samples())
+            self.trained_at = time.time()
+        finally:
+            self._train_lock.release()
+
+    def classify(self, text):
+        # Returns a decision dict, or None when no local tier is confident enough.
+        hits = matcher.count(text)
+
+        # HARD RULE: privacy keywords mean 100% PRIVATE, no model opinion asked.
+        if hits[TIER_PRIVATE]:
+            return private_request(text)
+
+        decision = keyword_decision(text, hits)
+        if decision and decision["confidence"] >= self.keyword_threshold:
+            return decision
+
+        self.refresh_model()
+        if self.model is not None:
+            category, confidence = self.model.predict(text)
+            if category and confidence >= self.model_threshold:
+                return complaint(text, category, TIER_MODEL, confidence)
+        return None
+
+
+engine = TieredClassifier()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# Anything that opens the default database during the tests (importing server
+# runs init_db) gets a throwaway file instead of the real apartment.db.
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="society-tests-"), "apartment.db")
+
+import ticket_store  # noqa: E402  (reads DB_PATH on import)
+
+
+@contextmanager
+def temp_db():
+    # A fresh ticket database for one test; DB_PATH and this thread's connection
+    # are put back even when the test fails.
+    previous = ticket_store.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tickets.db")
+        try:
+            ticket_store.init_db(path)
+            yield path
+        finally:
+            ticket_store.close()
+            ticket_store.DB_PATH = previous
+
+
+@pytest.fixture
+def db():
+    with temp_db() as path:
+        yield path
+
+
+@contextmanager
+def server_client():
+    # Flask test client on a fresh database, with fake_genai answering for Gemini.
+    import server
+    import fake_genai
+    with temp_db():
+        server.init_db()
+        model, upload_file = server.model, server.genai.upload_file
+        fake_genai.install(server, fake_genai.FakeModel(latency=0))
+        try:
+            yield server.app.test_client()
+        finally:
+            server.model, server.genai.upload_file = model, upload_file
+
+
+@pytest.fixture
+def client():
+    with server_client() as test_client:
+        yield test_client
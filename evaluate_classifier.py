@@ -0,0 +1,98 @@
+import argparse
+import random
+import sqlite3
+import statistics
+import time
+
+import ticket_store
+import classifier
+
+# Offline check of the local classifier tiers against stored ticket history.
+# The categories Gemini picked (tier llm/cache, or legacy rows) are the
+# reference labels; each tier is scored on the held-out tickets it would
+# have decided on its own.
+#
+#   python evaluate_classifier.py --db apartment.db --holdout 0.2
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e6
+
+
+def summarize(name, decided, total, latencies):
+    correct = sum(1 for ok in decided if ok)
+    coverage = len(decided) / total if total else 0.0
+    accuracy = correct / len(decided) if decided else 0.0
+    p50 = statistics.median(latencies) if latencies else 0.0
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else max(latencies, default=0.0)
+    print(f"{name:<10} coverage {coverage:6.1%}  accuracy {accuracy:6.1%}  "
+          f"({correct}/{len(decided)})  p50 {p50:8.1f}µs  p95 {p95:8.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the tiered classifier on stored tickets")
+    parser.add_argument("--db", default=ticket_store.DB_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction of tickets kept for testing")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keyword-threshold", type=float, default=classifier.KEYWORD_THRESHOLD)
+    parser.add_argument("--model-threshold", type=float, default=classifier.MODEL_THRESHOLD)
+    args = parser.parse_args()
+
+    # Read-only: init_db would migrate and prune the (production) database it is pointed at.
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    if "tier" in {row[1] for row in conn.execute("PRAGMA table_info(tickets)")}:
+        samples = classifier.load_training_samples(limit=-1, conn=conn)  # -1: whole history
+    else:
+        # Never migrated: every row predates the tiers, so all of them are reference labels.
+        samples = [(category, classifier.strip_issue_prefix(description)) for category, description in conn.execute(
+            "SELECT category, description FROM tickets WHERE category NOT IN ('General', 'Private')")]
+    conn.close()
+    if not samples:
+        print("No labelled tickets to evaluate.")
+        return
+
+    random.Random(args.seed).shuffle(samples)
+    split = max(1, int(len(samples) * args.holdout))
+    test, train = samples[:split], samples[split:]
+    model, train_us = timed(classifier.train_model, train)
+    print(f"📊 {len(train)} training / {len(test)} test tickets, "
+          f"model trained in {train_us / 1000:.1f}ms ({'ok' if model else 'not enough history'})")
+
+    keyword, model_tier, cascade = [], [], []
+    keyword_us, model_us, cascade_us = [], [], []
+    reached_llm = 0
+    for label, text in test:
+        hits, us = timed(classifier.matcher.count, text)
+        decision, more_us = timed(classifier.keyword_decision, text, hits)
+        keyword_us.append(us + more_us)
+        keyword_ok = decision and decision["confidence"] >= args.keyword_threshold
+        if keyword_ok:
+            keyword.append(decision["category"] == label)
+
+        predicted, confidence = None, 0.0
+        if model:
+            (predicted, confidence), us = timed(model.predict, text)
+            model_us.append(us)
+            if predicted and confidence >= args.model_threshold:
+                model_tier.append(predicted == label)
+
+        # The cascade as server.py runs it: keyword first, then the model, else Gemini.
+        cascade_us.append(keyword_us[-1] + (model_us[-1] if model and not keyword_ok else 0.0))
+        if keyword_ok:
+            cascade.append(decision["category"] == label)
+        elif predicted and confidence >= args.model_threshold:
+            cascade.append(predicted == label)
+        else:
+            reached_llm += 1
+
+    print(f"Thresholds: keyword >= {args.keyword_threshold}, model >= {args.model_threshold}")
+    summarize("keyword", keyword, len(test), keyword_us)
+    summarize("model", model_tier, len(test), model_us)
+    summarize("cascade", cascade, len(test), cascade_us)
+    print(f"llm        {reached_llm / len(test):6.1%} of test tickets would still go to Gemini")
+
+
+if __name__ == '__main__':
+    main()
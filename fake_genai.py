@@ -0,0 +1,92 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+import types
+
+# ==========================================
+# 🧪 LOCAL GEMINI STAND-IN
+# Drop-in for genai.GenerativeModel / genai.upload_file in benchmarks:
+# answers the same prompts server.py sends (single, batched and audio)
+# after a configurable delay, with optional jitter and injected errors.
+# No network, no API quota.
+# ==========================================
+COMPLAINTS = [
+    "water leaking from the ceiling in flat {n}",
+    "garbage not collected near tower {n}",
+    "power cut on floor {n} since morning",
+    "stranger roaming in parking lot {n}",
+    "the lift in block {n} is making a strange noise",   # no keyword: reaches the LLM tier
+    "please call flat {n}",                              # private
+    "neighbours in {n} playing loud music late at night",
+]
+CATEGORIES = ["Plumbing", "Electrical", "Security", "Cleaning"]
+
+
+class FakeGeminiError(Exception):
+    pass
+
+
+class FakeModel:
+    def __init__(self, latency=0.2, jitter=0.0, error_rate=0.0, upload_latency=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.upload_latency = latency / 2 if upload_latency is None else upload_latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _delay(self, base):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, base + self._random.uniform(-self.jitter, self.jitter))
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise FakeGeminiError("503 The model is overloaded (injected)")
+
+    def upload_file(self, path):
+        self._delay(self.upload_latency)
+        with open(path, 'rb') as f:
+            return types.SimpleNamespace(name=path, digest=hashlib.sha256(f.read()).hexdigest())
+
+    def generate_content(self, contents):
+        self._delay(self.latency)
+        if isinstance(contents, list):
+            # [uploaded audio, transcribe+classify prompt]
+            digest = int(contents[0].digest, 16)
+            transcript = COMPLAINTS[digest % len(COMPLAINTS)].format(n=digest % 900 + 100)
+            answer = dict(self._classify(transcript), transcript=transcript)
+        else:
+            items = re.findall(r'^\s*(\d+)\. (".*")$', contents, re.M)
+            if items:
+                answer = [dict(self._classify(json.loads(text)), item=int(n)) for n, text in items]
+            else:
+                # Non-greedy up to the end of the prompt line, not into the JSON template after it
+                text = re.search(r'Analyze this complaint: "(.*?)"\n', contents, re.S)
+                answer = self._classify(text.group(1) if text else "")
+        return types.SimpleNamespace(text=json.dumps(answer))
+
+    def _classify(self, text):
+        category = CATEGORIES[int(hashlib.md5(text.encode()).hexdigest(), 16) % len(CATEGORIES)]
+        return {"intent": "complaint", "category": category, "text": f"Issue: {text}"}
+
+
+def from_env():
+    return FakeModel(
+        latency=float(os.environ.get("FAKE_GEMINI_LATENCY", 0.2)),
+        jitter=float(os.environ.get("FAKE_GEMINI_JITTER", 0.0)),
+        error_rate=float(os.environ.get("FAKE_GEMINI_ERROR_RATE", 0.0)),
+    )
+
+
+def install(server_module, fake=None):
+    # Swap the real model and upload call in an imported server module.
+    fake = fake or from_env()
+    server_module.model = fake
+    server_module.genai.upload_file = fake.upload_file
+    return fake
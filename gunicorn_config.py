@@ -1,2 +1,20 @@
+import os
+
 bind = "0.0.0.0:10000"
-workers = 2
\ No newline at end of file
+workers = 2
+# gthread rather than sync: requests spend most of their time waiting on Gemini,
+# and a sync worker holds one request at a time - two workers meant two uploads
+# in flight, and a single open /tickets/stream pinned a whole worker.
+# bench_load.py, 8 clients, 0.1s fake Gemini: sync:2 ~75 req/s (p95 258ms),
+# gthread:2x8 ~220 req/s (p95 184ms).
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 128))
+
+
+def on_starting(server):
+    # Every open /tickets/stream holds one worker thread for as long as the dashboard
+    # stays open. server.py answers 503 (with a retry hint) past SSE_MAX_STREAMS per
+    # worker, so a quarter of the threads always stay free for uploads, /resolve and
+    # page loads: 96 streams + 32 request threads per worker with the default 128.
+    # Set here, after command-line overrides of --threads, and inherited by the workers.
+    os.environ.setdefault("SSE_MAX_STREAMS", str(server.cfg.threads * 3 // 4))
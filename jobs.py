@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ticket_store
+
+# ==========================================
+# 🧵 BACKGROUND JOBS
+# Audio uploads in async mode are queued here and processed by a small
+# per-worker thread pool. Job state lives in apartment.db, so /jobs/<id>
+# answers from either gunicorn worker.
+# ==========================================
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 32))   # running + waiting, per worker
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_BACKOFF = float(os.environ.get("JOB_BACKOFF", 1.0))       # seconds, doubled per retry
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", 24 * 3600))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS jobs
+       (id TEXT PRIMARY KEY,
+        status TEXT,
+        attempts INTEGER DEFAULT 0,
+        file_path TEXT,
+        result TEXT,
+        error TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs(status, updated_at)",
+]
+
+INSERT_JOB = "INSERT INTO jobs (id, status, file_path) VALUES (?, 'queued', ?)"
+START_ATTEMPT = "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+FINISH_JOB = "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+SELECT_JOB = "SELECT * FROM jobs WHERE id = ?"
+DELETE_JOB = "DELETE FROM jobs WHERE id = ?"
+# Also picks up jobs left queued/running by a worker that died mid-job.
+SELECT_EXPIRED = "SELECT id, file_path FROM jobs WHERE updated_at < datetime('now', ?)"
+
+
+class QueueFull(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_slots = None
+
+
+def init_jobs():
+    with ticket_store.transaction() as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+
+def _get_pool():
+    global _pool, _pool_pid, _slots
+    with _lock:
+        # Created lazily so each forked gunicorn worker owns its own threads.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="audio-job")
+            _slots = threading.BoundedSemaphore(JOB_QUEUE_SIZE)
+            _pool_pid = os.getpid()
+        return _pool, _slots
+
+
+def submit(process, file_path):
+    # Queue process(file_path) and return the job id; raises QueueFull when saturated.
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise QueueFull("Too many audio jobs in progress")
+
+    job_id = uuid.uuid4().hex
+    try:
+        with ticket_store.transaction() as conn:
+            conn.execute(INSERT_JOB, (job_id, file_path))
+        pool.submit(_run, job_id, process, file_path, slots)
+    except BaseException:
+        slots.release()
+        raise
+    purge_expired()
+    return job_id
+
+
+def _run(job_id, process, file_path, slots):
+    try:
+        for attempt in range(1, JOB_MAX_ATTEMPTS + 1):
+            try:
+                # A DB error here (e.g. lock timeout) counts as a failed attempt too.
+                with ticket_store.transaction() as conn:
+                    conn.execute(START_ATTEMPT, (job_id,))
+                result = process(file_path)
+            except Exception as e:
+                print(f"Job {job_id} attempt {attempt} failed: {e}")
+                if attempt == JOB_MAX_ATTEMPTS:
+                    _finish(job_id, FAILED, error=str(e))
+                    return
+                # Exponential backoff with jitter so retries don't hit the API in lockstep
+                time.sleep(JOB_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                continue
+            if _finish(job_id, DONE, result=result) == DONE:
+                _remove_file(file_path)  # audio is no longer needed once processed
+            return
+    finally:
+        slots.release()
+
+
+def _finish(job_id, status, result=None, error=None):
+    # Never raises: a job must not be left 'running'. If the result can't be stored
+    # the job is recorded as failed instead, retrying the write with backoff.
+    for attempt in range(JOB_MAX_ATTEMPTS):
+        try:
+            with ticket_store.transaction() as conn:
+                conn.execute(FINISH_JOB, (status, json.dumps(result) if result is not None else None, error, job_id))
+            return status
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Job {job_id} could not be marked {status}: {e}")
+            status, result, error = FAILED, None, f"Could not save the result: {e}"
+            time.sleep(JOB_BACKOFF * 2 ** attempt)
+    return None  # still unrecorded; purge_expired drops it after JOB_RETENTION
+
+
+def _remove_file(file_path):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def get_job(job_id):
+    with ticket_store.connection() as conn:
+        row = conn.execute(SELECT_JOB, (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def delete_job(job_id):
+    # Removes a finished job and its audio file. Returns None if unknown, False if still running.
+    job = get_job(job_id)
+    if job is None:
+        return None
+    if job["status"] not in (DONE, FAILED):
+        return False
+    _remove_file(job["file_path"])
+    with ticket_store.transaction() as conn:
+        conn.execute(DELETE_JOB, (job_id,))
+    return True
+
+
+def purge_expired():
+    # Jobs nobody collected (or stuck unfinished) are dropped after JOB_RETENTION, audio included.
+    with ticket_store.connection() as conn:
+        expired = conn.execute(SELECT_EXPIRED, (f"-{JOB_RETENTION} seconds",)).fetchall()
+    for row in expired:
+        _remove_file(row["file_path"])
+    if expired:
+        with ticket_store.transaction() as conn:
+            conn.executemany(DELETE_JOB, [(row["id"],) for row in expired])
@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import queue
+import uuid
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+# ==========================================
+# 📈 METRICS
+# Per-worker histograms and counters kept in memory (a lock and a few adds
+# per observation). Each worker snapshots them every METRICS_FLUSH_INTERVAL
+# seconds (only when something changed) into a small SQLite file of its own,
+# so flushing never takes the ticket database's write lock or wakes the
+# change-feed pollers. /metrics merges every worker's snapshot into one
+# Prometheus text page.
+# ==========================================
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+METRICS_HEARTBEAT = float(os.environ.get("METRICS_HEARTBEAT", 300))  # rewrite an unchanged snapshot this often
+# A worker silent this long is gone; its totals are folded into the "retired" row so
+# the exported counters never go backwards (Prometheus would read that as a reset).
+METRICS_STALE_AFTER = int(os.environ.get("METRICS_STALE_AFTER", 3600))
+# Default: next to the ticket database, e.g. apartment-metrics.db
+METRICS_DB_PATH = os.environ.get("METRICS_DB_PATH")
+
+# Optional structured request log: REQUEST_LOG=1, written by a background thread.
+REQUEST_LOG = os.environ.get("REQUEST_LOG", "0") == "1"
+REQUEST_LOG_PATH = os.environ.get("REQUEST_LOG_PATH", "requests.jsonl")
+REQUEST_LOG_QUEUE = 10000
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS = {
+    "society_request_duration_seconds": ("histogram", "HTTP request latency by endpoint"),
+    "society_stage_duration_seconds": ("histogram", "Latency of each processing stage"),
+    "society_db_duration_seconds": ("histogram", "SQLite operation latency"),
+    "society_classification_total": ("counter", "Classification decisions by tier"),
+    "society_cache_requests_total": ("counter", "Result cache lookups by outcome"),
+    "society_batch_size": ("histogram", "Items per Gemini classification batch"),
+    "society_batch_wait_seconds": ("histogram", "Time a classification waited for its batch"),
+    "society_request_log_dropped_total": ("counter", "Request log lines dropped because the buffer was full"),
+}
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS metrics_snapshots
+       (worker TEXT PRIMARY KEY,
+        data TEXT,
+        updated_at REAL)''',
+]
+RETIRED = "retired"
+UPSERT_SNAPSHOT = "INSERT OR REPLACE INTO metrics_snapshots (worker, data, updated_at) VALUES (?, ?, ?)"
+SELECT_STALE = "SELECT worker, data FROM metrics_snapshots WHERE worker != ? AND updated_at < ?"
+
+_lock = threading.Lock()
+_histograms = {}   # (name, labels) -> [bucket counts..., sum, count]
+_counters = {}     # (name, labels) -> value
+_flusher_pid = None
+_initialized = False   # snapshots are only flushed once init_metrics has created the table
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, value, **labels):
+    buckets = SIZE_BUCKETS if name == "society_batch_size" else BUCKETS
+    key = (name, _labels(labels))
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+        entry[bisect_left(buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+    _ensure_flusher()
+
+
+def inc(name, amount=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _ensure_flusher()
+
+
+@contextmanager
+def _timed(name, labels, log_key):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(name, elapsed, **labels)
+        # Inside a request the stage also lands in that request's log line.
+        if has_request_context():
+            stages = g.setdefault("stages", {})
+            stages[log_key] = round(stages.get(log_key, 0.0) + elapsed * 1000, 3)
+
+
+def timer(stage):
+    return _timed("society_stage_duration_seconds", {"stage": stage}, stage)
+
+
+def db_timer(op):
+    return _timed("society_db_duration_seconds", {"op": op}, f"db_{op}")
+
+
+def annotate(**fields):
+    # Extra fields (tier, outcome, ...) for the current request's log line.
+    if has_request_context():
+        g.setdefault("log_fields", {}).update(fields)
+
+
+# --- Cross-worker aggregation ---
+_db_lock = threading.Lock()
+_db = None          # (pid, path, connection) - one per worker, shared by the flusher and /metrics
+_db_path = None
+_worker = None      # (pid, id); a fresh id per process, so a reused pid never overwrites a dead worker's row
+_last_flush = None  # (worker id, data, time) of this worker's last write
+
+
+def init_metrics(path=None):
+    global _initialized, _db_path
+    import ticket_store  # imported here: ticket_store itself reports DB timings to this module
+    _db_path = path or METRICS_DB_PATH or os.path.splitext(ticket_store.DB_PATH)[0] + "-metrics.db"
+    with _metrics_db(write=True) as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+    _initialized = True
+
+
+@contextmanager
+def _metrics_db(write=False):
+    global _db
+    import ticket_store
+    with _db_lock:
+        if _db is None or _db[0] != os.getpid() or _db[1] != _db_path:
+            _db = (os.getpid(), _db_path, ticket_store.connect(_db_path))
+        conn = _db[2]
+        conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def worker_id():
+    global _worker
+    if _worker is None or _worker[0] != os.getpid():
+        _worker = (os.getpid(), f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+    return _worker[1]
+
+
+def snapshot():
+    with _lock:
+        return {
+            "histograms": [[name, labels, list(values)] for (name, labels), values in _histograms.items()],
+            "counters": [[name, labels, value] for (name, labels), value in _counters.items()],
+        }
+
+
+def flush():
+    # Returns False when nothing changed since the last write (and no heartbeat is due).
+    global _last_flush
+    worker, data, now = worker_id(), json.dumps(snapshot()), time.time()
+    if _last_flush and _last_flush[:2] == (worker, data) and now - _last_flush[2] < METRICS_HEARTBEAT:
+        return False
+    with _metrics_db(write=True) as conn:
+        conn.execute(UPSERT_SNAPSHOT, (worker, data, now))
+        _retire_stale(conn, now)
+    _last_flush = (worker, data, now)
+    return True
+
+
+def _retire_stale(conn, now):
+    stale = conn.execute(SELECT_STALE, (RETIRED, now - METRICS_STALE_AFTER)).fetchall()
+    if not stale:
+        return
+    retired = conn.execute("SELECT data FROM metrics_snapshots WHERE worker = ?", (RETIRED,)).fetchall()
+    merged = _merge([json.loads(row["data"]) for row in list(stale) + retired])
+    conn.execute(UPSERT_SNAPSHOT, (RETIRED, json.dumps(_as_snapshot(*merged)), now))
+    conn.executemany("DELETE FROM metrics_snapshots WHERE worker = ?", [(row["worker"],) for row in stale])
+
+
+def _ensure_flusher():
+    global _flusher_pid
+    if not _initialized or _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception as e:
+            print(f"Metrics flush failed: {e}")
+
+
+def collect():
+    # Every worker's stored snapshot, this one's flushed first. Reading only stored rows
+    # keeps each series monotonic whichever worker answers the scrape.
+    flush()
+    with _metrics_db() as conn:
+        rows = conn.execute("SELECT data FROM metrics_snapshots").fetchall()
+    return _merge(json.loads(row["data"]) for row in rows)
+
+
+def _merge(snapshots):
+    histograms, counters = {}, {}
+    for snap in snapshots:
+        for name, labels, values in snap["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [0] * len(values))
+            histograms[key] = [a + b for a, b in zip(merged, values)]
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _as_snapshot(histograms, counters):
+    return {
+        "histograms": [[name, labels, values] for (name, labels), values in histograms.items()],
+        "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+    }
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    histograms, counters = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        series = histograms if kind == "histogram" else counters
+        keys = sorted(key for key in series if key[0] == name)
+        if not keys:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in keys:
+            labels = key[1]
+            if kind == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {series[key]}")
+                continue
+            values = series[key]
+            buckets = SIZE_BUCKETS if name == "society_batch_size" else BUCKETS
+            cumulative = 0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {values[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Buffered request log ---
+_log_queue = None
+_log_pid = None
+
+
+def log_request(record):
+    # Never blocks the request: lines go to a bounded queue, dropped (and counted) when full.
+    global _log_queue, _log_pid
+    if not REQUEST_LOG:
+        return
+    if _log_pid != os.getpid():
+        with _lock:
+            if _log_pid != os.getpid():
+                _log_queue = queue.Queue(maxsize=REQUEST_LOG_QUEUE)
+                threading.Thread(target=_log_writer, args=(_log_queue,), name="request-log", daemon=True).start()
+                _log_pid = os.getpid()
+    try:
+        _log_queue.put_nowait(record)
+    except queue.Full:
+        inc("society_request_log_dropped_total")
+
+
+def _log_writer(pending):
+    # O_APPEND + one write() per batch, so lines from both workers don't interleave.
+    fd = os.open(REQUEST_LOG_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    while True:
+        lines = [pending.get()]
+        try:
+            while len(lines) < 500:
+                lines.append(pending.get_nowait())
+        except queue.Empty:
+            pass
+        data = "".join(json.dumps(line, default=str) + "\n" for line in lines)
+        try:
+            os.write(fd, data.encode())
+        except OSError as e:
+            print(f"Request log write failed: {e}")
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import metrics
+import ticket_store
+
+# ==========================================
+# 💾 RESULT CACHE
+# Gemini classifications (keyed by normalized text) and transcripts (keyed by
+# a hash of the audio bytes), kept in apartment.db so both workers share them.
+# Expired after CACHE_TTL seconds; each namespace keeps at most
+# CACHE_MAX_ENTRIES, evicting the least recently used. Best-effort: a SQLite
+# error (e.g. "database is locked") is logged and treated as a miss / skipped store.
+# ==========================================
+CACHE_ENABLED = os.environ.get("RESULT_CACHE", "1") != "0"
+CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 5000))
+TOUCH_INTERVAL = 60  # only rewrite last_used on a hit if it is older than this
+
+CLASSIFY = "classify"
+TRANSCRIBE = "transcribe"
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS result_cache
+       (namespace TEXT,
+        key TEXT,
+        value TEXT,
+        created_at REAL,
+        last_used REAL,
+        PRIMARY KEY (namespace, key)) WITHOUT ROWID''',
+    "CREATE INDEX IF NOT EXISTS idx_result_cache_lru ON result_cache(namespace, last_used)",
+    "CREATE INDEX IF NOT EXISTS idx_result_cache_created ON result_cache(created_at)",
+]
+
+SELECT_ENTRY = "SELECT value, last_used FROM result_cache WHERE namespace = ? AND key = ? AND created_at > ?"
+TOUCH_ENTRY = "UPDATE result_cache SET last_used = ? WHERE namespace = ? AND key = ?"
+UPSERT_ENTRY = "INSERT OR REPLACE INTO result_cache (namespace, key, value, created_at, last_used) VALUES (?, ?, ?, ?, ?)"
+DELETE_EXPIRED = "DELETE FROM result_cache WHERE created_at <= ?"
+EVICT_LRU = ("DELETE FROM result_cache WHERE namespace = ? AND key IN "
+             "(SELECT key FROM result_cache WHERE namespace = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)")
+COUNT_ENTRIES = "SELECT namespace, COUNT(*) FROM result_cache GROUP BY namespace"
+
+# Per-worker hit/miss counters
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def init_cache():
+    with ticket_store.transaction() as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+
+def text_key(text):
+    # "Water leaking in B-block lift." and "water leaking in  b-block lift" share an entry.
+    normalized = " ".join(text.lower().split()).strip(" .!?")
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def file_key(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _count(namespace, outcome):
+    with _stats_lock:
+        counts = _stats.setdefault(namespace, {"hits": 0, "misses": 0, "bypassed": 0})
+        counts[outcome] += 1
+    metrics.inc("society_cache_requests_total", namespace=namespace, outcome=outcome)
+
+
+def get(namespace, key, bypass=False):
+    if not CACHE_ENABLED or bypass:
+        _count(namespace, "bypassed")
+        return None
+
+    now = time.time()
+    try:
+        with ticket_store.connection() as conn:
+            row = conn.execute(SELECT_ENTRY, (namespace, key, now - CACHE_TTL)).fetchone()
+    except sqlite3.Error as e:
+        print(f"Cache read failed ({namespace}): {e}")
+        row = None
+    if row is None:
+        _count(namespace, "misses")
+        return None
+
+    _count(namespace, "hits")
+    if row["last_used"] < now - TOUCH_INTERVAL:
+        try:
+            with ticket_store.transaction() as conn:
+                conn.execute(TOUCH_ENTRY, (now, namespace, key))
+        except sqlite3.Error as e:
+            print(f"Cache touch failed ({namespace}): {e}")  # the hit itself is still good
+    return json.loads(row["value"])
+
+
+def put(namespace, key, value):
+    # Only called after a real API call, so the eviction pass is cheap in comparison.
+    if not CACHE_ENABLED:
+        return
+    now = time.time()
+    try:
+        with ticket_store.transaction() as conn:
+            conn.execute(UPSERT_ENTRY, (namespace, key, json.dumps(value), now, now))
+            conn.execute(DELETE_EXPIRED, (now - CACHE_TTL,))
+            conn.execute(EVICT_LRU, (namespace, namespace, CACHE_MAX_ENTRIES))
+    except sqlite3.Error as e:
+        print(f"Cache write failed ({namespace}): {e}")  # the caller still has its answer
+
+
+def stats():
+    with _stats_lock:
+        counts = {namespace: dict(values) for namespace, values in _stats.items()}
+    with ticket_store.connection() as conn:
+        entry_counts = conn.execute(COUNT_ENTRIES).fetchall()
+    for namespace, entries in entry_counts:
+        counts.setdefault(namespace, {"hits": 0, "misses": 0, "bypassed": 0})["entries"] = entries
+    return {"pid": os.getpid(), "enabled": CACHE_ENABLED, "namespaces": counts}
@@ -1,8 +1,21 @@
 import os
 import json
+import time
+import uuid
 import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
 import google.generativeai as genai
-from flask import Flask, request, jsonify, render_template, redirect, url_for
+from flask import Flask, request, jsonify, render_template, redirect, url_for, make_response, Response, stream_with_context, g
+import ticket_store
+import result_cache
+import classifier
+import jobs
+import bulk
+import metrics
+from ticket_feed import feed
+from batcher import ClassificationBatcher
 
 app = Flask(__name__)
 
@@ -20,92 +33,249 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # --- Database Setup ---
 def init_db():
-    conn = sqlite3.connect('apartment.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS tickets
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  category TEXT,
-                  description TEXT,
-                  status TEXT,
-                  created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
-    conn.commit()
-    conn.close()
+    # Schema, indexes and WAL mode live in ticket_store; connections are reused per worker.
+    ticket_store.init_db()
+    result_cache.init_cache()
+    jobs.init_jobs()
+    metrics.init_metrics()
 
 init_db()
 
-# --- 🧠 FORCE PRIVACY LOGIC ---
-def strict_privacy_check(text):
-    text_lower = text.lower()
-    
-    # 1. HARD RULE: If these words exist, it is 100% PRIVATE.
-    # We do NOT ask the AI's opinion for these to avoid mistakes.
-    private_keywords = ["call", "phone", "message", "contact", "connect", "ring", "talk to"]
-    
-    for word in private_keywords:
-        if word in text_lower:
-            # Extract target (simple logic: look for numbers like '101')
-            target = ''.join(filter(str.isdigit, text)) or "Security"
-            return {
-                "intent": "private",
-                "action": "call" if "mess" not in text_lower else "message",
-                "target": target,
-                "text": text,
-                "category": "Private"
-            }
-
-    # 2. If no keywords, ask AI to classify the complaint
+def cache_bypassed():
+    # Clients can force a fresh Gemini call (the new result still refreshes the cache).
+    return request.headers.get('X-Cache-Bypass') == '1' or request.args.get('nocache') == '1'
+
+# --- 🤖 GEMINI CLASSIFICATION ---
+def parse_json_reply(response):
+    return json.loads(response.text.replace("```json", "").replace("```", "").strip())
+
+def classify_with_llm(text):
     prompt = f"""
     Analyze this complaint: "{text}"
     Output valid JSON: {{"intent": "complaint", "category": "Maintenance", "text": "Issue: {text}"}}
     Categories: Plumbing, Electrical, Security, Cleaning.
     """
+    return parse_json_reply(model.generate_content(prompt))
+
+def classify_batch_with_llm(texts):
+    # One prompt for many complaints; the batcher matches answers back by item number.
+    numbered = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts, 1))
+    prompt = f"""
+    Analyze each numbered complaint below.
+    Output ONLY a valid JSON array with one object per complaint, each with its item number:
+    [{{"item": 1, "intent": "complaint", "category": "Maintenance"}}, ...]
+    Categories: Plumbing, Electrical, Security, Cleaning.
+
+    {numbered}
+    """
+    return parse_json_reply(model.generate_content(prompt))
+
+llm_batcher = ClassificationBatcher(classify_batch_with_llm, classify_with_llm)
+
+# --- 🧠 FORCE PRIVACY LOGIC ---
+def fallback_classification(text):
+    return {"intent": "complaint", "category": "General", "text": text, "tier": classifier.TIER_FALLBACK}
+
+def record_decision(ai_data):
+    metrics.inc("society_classification_total", tier=ai_data.get('tier'))
+    metrics.annotate(tier=ai_data.get('tier'), intent=ai_data.get('intent'))
+    return ai_data
+
+def llm_decision(ai_data, text):
+    # The description is always the submitted text, never the model's echo of it.
+    return dict(ai_data, text=f"Issue: {text}")
+
+def cached_decision(cached, text):
+    # Keys are normalised, so the stored wording may be another resident's: keep
+    # the category, but describe this ticket in the words actually submitted.
+    return dict(cached, text=f"Issue: {text}", tier=classifier.TIER_CACHE)
+
+def strict_privacy_check(text, bypass_cache=False):
+    with metrics.timer("classify"):
+        return record_decision(classify_text(text, bypass_cache))
+
+def classify_text(text, bypass_cache=False):
+    # 1. Local tiers: privacy HARD RULE, keyword matcher, then the naive Bayes model.
+    # Private words always win - we do NOT ask the AI's opinion for these.
+    with metrics.timer("classify_local"):
+        decision = classifier.engine.classify(text)
+    if decision is not None:
+        return decision
+
+    # 2. Same complaint seen before? Reuse the stored classification.
+    cache_key = result_cache.text_key(text)
+    with metrics.timer("classify_cache"):
+        cached = result_cache.get(result_cache.CLASSIFY, cache_key, bypass=bypass_cache)
+    if cached is not None:
+        return cached_decision(cached, text)
+
+    # 3. Otherwise ask AI to classify the complaint (batched with concurrent requests)
     try:
-        response = model.generate_content(prompt)
-        clean_text = response.text.replace("```json", "").replace("```", "").strip()
-        return json.loads(clean_text)
+        with metrics.timer("classify_llm"):
+            ai_data = llm_batcher.classify(text)
     except:
         # Fallback to complaint if AI fails
-        return {"intent": "complaint", "category": "General", "text": text}
+        return fallback_classification(text)
+
+    # Only real model answers are cached, never the fallback above.
+    ai_data = llm_decision(ai_data, text)
+    result_cache.put(result_cache.CLASSIFY, cache_key, ai_data)
+    return dict(ai_data, tier=classifier.TIER_LLM)
+
+def strict_privacy_check_many(texts, bypass_cache=False):
+    # Same tiers as strict_privacy_check, but whatever is left for Gemini goes
+    # through the batcher together, so it fills whole batches.
+    results = [None] * len(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        decision = classifier.engine.classify(text)
+        if decision is None:
+            cached = result_cache.get(result_cache.CLASSIFY, result_cache.text_key(text), bypass=bypass_cache)
+            if cached is not None:
+                decision = cached_decision(cached, text)
+        if decision is None:
+            pending.append(i)
+        else:
+            results[i] = decision
+
+    answers = llm_batcher.classify_many([texts[i] for i in pending]) if pending else []
+    for i, ai_data in zip(pending, answers):
+        if isinstance(ai_data, dict):
+            ai_data = llm_decision(ai_data, texts[i])
+            result_cache.put(result_cache.CLASSIFY, result_cache.text_key(texts[i]), ai_data)
+            results[i] = dict(ai_data, tier=classifier.TIER_LLM)
+        else:
+            results[i] = fallback_classification(texts[i])
+    for ai_data in results:
+        metrics.inc("society_classification_total", tier=ai_data.get('tier'))
+    return results
+
+# --- ⏱️ Request Timing & Log ---
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    elapsed = time.perf_counter() - g.pop('request_start', time.perf_counter())
+    endpoint = request.endpoint or 'unmatched'
+    metrics.observe("society_request_duration_seconds", elapsed,
+                    endpoint=endpoint, method=request.method, status=response.status_code)
+    metrics.log_request({
+        "ts": time.time(),
+        "method": request.method,
+        "path": request.path,
+        "endpoint": endpoint,
+        "status": response.status_code,
+        "duration_ms": round(elapsed * 1000, 3),
+        "stages": g.get('stages', {}),
+        **g.get('log_fields', {}),
+    })
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    # Histograms and counters merged across all gunicorn workers
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def home():
     return "Server Running (Model: models/gemini-flash-latest)"
 
 # --- AUDIO HANDLER ---
+# One round-trip instead of two: transcript and classification in the same answer.
+TRANSCRIBE_AND_CLASSIFY_PROMPT = """
+Transcribe this audio exactly into English text, then classify it as a complaint.
+Output valid JSON: {"transcript": "<exact transcript>", "intent": "complaint", "category": "Maintenance", "text": "Issue: <exact transcript>"}
+Categories: Plumbing, Electrical, Security, Cleaning.
+"""
+
+def transcribe_and_classify(file_path, bypass_cache=False):
+    # Identical clips reuse the cached transcript and skip the upload entirely.
+    with metrics.timer("audio_hash"):
+        audio_key = result_cache.file_key(file_path)
+    with metrics.timer("transcript_cache"):
+        transcribed_text = result_cache.get(result_cache.TRANSCRIBE, audio_key, bypass=bypass_cache)
+    if transcribed_text is not None:
+        metrics.annotate(transcript="cache")
+        return transcribed_text, strict_privacy_check(transcribed_text, bypass_cache)
+
+    metrics.annotate(transcript="llm")
+    with metrics.timer("gemini_upload"):
+        myfile = genai.upload_file(file_path)
+    with metrics.timer("gemini_transcribe_classify"):
+        result = model.generate_content([myfile, TRANSCRIBE_AND_CLASSIFY_PROMPT])
+    try:
+        ai_data = parse_json_reply(result)
+    except ValueError:
+        ai_data = result.text.strip()
+    if isinstance(ai_data, str):
+        # Plain-text reply: take it as the transcript and classify it the usual way.
+        transcribed_text = ai_data.strip()
+        result_cache.put(result_cache.TRANSCRIBE, audio_key, transcribed_text)
+        return transcribed_text, strict_privacy_check(transcribed_text, bypass_cache)
+    if not isinstance(ai_data, dict) or not isinstance(ai_data.get("transcript"), str):
+        raise ValueError("Gemini reply has no transcript")
+    transcribed_text = ai_data.pop("transcript").strip()
+    result_cache.put(result_cache.TRANSCRIBE, audio_key, transcribed_text)
+
+    # The privacy HARD RULE still outranks the model's opinion.
+    decision = classifier.engine.classify(transcribed_text)
+    if decision is not None and decision['intent'] == 'private':
+        return transcribed_text, record_decision(decision)
+    if not ai_data.get("intent") or not ai_data.get("category"):
+        return transcribed_text, record_decision(fallback_classification(transcribed_text))
+    ai_data = llm_decision(ai_data, transcribed_text)
+    result_cache.put(result_cache.CLASSIFY, result_cache.text_key(transcribed_text), ai_data)
+    return transcribed_text, record_decision(dict(ai_data, tier=classifier.TIER_LLM))
+
+def process_audio(file_path, bypass_cache=False):
+    # 1. Transcribe + classify (privacy rule included)
+    transcribed_text, ai_data = transcribe_and_classify(file_path, bypass_cache)
+    print(f"🎤 Heard: {transcribed_text}")
+
+    # 2. Save ONLY if Complaint
+    if ai_data.get('intent') == 'complaint':
+        ticket_store.create_ticket(ai_data.get('category', 'General'), ai_data.get('text'),
+                                   tier=ai_data.get('tier'))
+        metrics.annotate(outcome="ticket_created")
+        print("✅ Ticket Saved")
+    else:
+        metrics.annotate(outcome="private")
+        print("🔒 Private Call Detected - DB Skipped")
+    return ai_data
+
+def wants_async():
+    return request.args.get('async') == '1' or 'respond-async' in request.headers.get('Prefer', '')
+
 @app.route('/upload_audio', methods=['POST'])
 def upload_audio():
     if 'audio' not in request.files:
         return jsonify({"message": "No audio file", "status": "error"}), 400
     
+    # Unique name per upload so concurrent voice notes never overwrite each other
     audio_file = request.files['audio']
-    file_path = os.path.join(UPLOAD_FOLDER, "command.m4a")
-    audio_file.save(file_path)
-    
-    try:
-        # 1. Transcribe Audio ONLY
-        myfile = genai.upload_file(file_path)
-        transcribe_prompt = "Transcribe this audio exactly into English text. Output ONLY the text."
-        
-        result = model.generate_content([myfile, transcribe_prompt])
-        transcribed_text = result.text.strip()
-        
-        print(f"🎤 Heard: {transcribed_text}")
-
-        # 2. Run Strict Privacy Check
-        ai_data = strict_privacy_check(transcribed_text)
-        
-        # 3. Save ONLY if Complaint
-        if ai_data.get('intent') == 'complaint':
-            conn = sqlite3.connect('apartment.db')
-            c = conn.cursor()
-            c.execute("INSERT INTO tickets (category, description, status) VALUES (?, ?, ?)",
-                      (ai_data.get('category', 'General'), ai_data.get('text'), 'Open'))
-            conn.commit()
-            conn.close()
-            print("✅ Ticket Saved")
-        else:
-            print("🔒 Private Call Detected - DB Skipped")
+    extension = os.path.splitext(audio_file.filename or '')[1] or '.m4a'
+    file_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}{extension}")
+    with metrics.timer("audio_save"):
+        audio_file.save(file_path)
+    bypass_cache = cache_bypassed()
+
+    if wants_async():
+        try:
+            job_id = jobs.submit(lambda path: process_audio(path, bypass_cache), file_path)
+        except jobs.QueueFull as e:
+            os.remove(file_path)
+            response = jsonify({"message": str(e), "status": "error"})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        status_url = url_for('get_job', job_id=job_id)
+        response = jsonify({"message": "Accepted", "job_id": job_id, "status_url": status_url, "status": "queued"})
+        response.headers['Location'] = status_url
+        return response, 202
 
+    try:
+        ai_data = process_audio(file_path, bypass_cache)
         return jsonify({
             "message": "Processed", 
             "ai_response": json.dumps(ai_data),
@@ -115,6 +285,32 @@ def upload_audio():
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({"message": f"Server Error: {e}", "status": "error"}), 500
+    finally:
+        os.remove(file_path)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"message": "Unknown job", "status": "error"}), 404
+    return jsonify({
+        "job_id": job['id'],
+        "status": job['status'],
+        "attempts": job['attempts'],
+        "ai_response": json.dumps(job['result']) if job['result'] is not None else None,
+        "error": job['error'],
+        "created_at": job['created_at'],
+        "updated_at": job['updated_at'],
+    })
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    deleted = jobs.delete_job(job_id)
+    if deleted is None:
+        return jsonify({"message": "Unknown job", "status": "error"}), 404
+    if not deleted:
+        return jsonify({"message": "Job still in progress", "status": "error"}), 409
+    return jsonify({"message": "Deleted", "status": "success"})
 
 # --- TEXT HANDLER ---
 @app.route('/upload_text', methods=['POST'])
@@ -123,15 +319,14 @@ def upload_text():
     user_text = data.get('text', '')
     
     # Run Strict Privacy Check
-    ai_data = strict_privacy_check(user_text)
+    ai_data = strict_privacy_check(user_text, cache_bypassed())
 
     if ai_data.get('intent') == 'complaint':
-        conn = sqlite3.connect('apartment.db')
-        c = conn.cursor()
-        c.execute("INSERT INTO tickets (category, description, status) VALUES (?, ?, ?)",
-                  (ai_data.get('category', 'General'), ai_data.get('text'), 'Open'))
-        conn.commit()
-        conn.close()
+        ticket_store.create_ticket(ai_data.get('category', 'General'), ai_data.get('text'),
+                                   tier=ai_data.get('tier'))
+        metrics.annotate(outcome="ticket_created")
+    else:
+        metrics.annotate(outcome="private")
 
     return jsonify({
         "message": "Processed", 
@@ -140,35 +335,238 @@ def upload_text():
     })
 
 # --- Dashboard & Tickets ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+FILTER_ARGS = ('status', 'category', 'since', 'until')
+
+def parse_ticket_query():
+    # Returns (query dict for ticket_store.list_tickets, error message)
+    query = {
+        'before_id': request.args.get('before_id', type=int),
+        'limit': min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE),
+        'status': request.args.get('status'),
+        'category': request.args.get('category'),
+    }
+    for key in ('since', 'until'):
+        value = request.args.get(key)
+        if value:
+            try:
+                # fromisoformat only accepts a trailing "Z" from Python 3.11 on
+                parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith(('Z', 'z')) else value)
+            except ValueError:
+                return None, f"Invalid '{key}' timestamp: {value}"
+            if parsed.tzinfo:
+                parsed = parsed.astimezone(timezone.utc)  # naive values are taken as UTC
+            # Same "YYYY-MM-DD HH:MM:SS" UTC format SQLite uses for created_at
+            value = parsed.strftime('%Y-%m-%d %H:%M:%S')
+        query[key] = value
+    return query, None
+
+def next_page_args(query, rows):
+    if len(rows) < query['limit']:
+        return None
+    args = {key: query[key] for key in FILTER_ARGS if query[key]}
+    args.update(before_id=rows[-1]['id'], limit=query['limit'])
+    return args
+
+def ticket_validators():
+    # ETag / Last-Modified from the newest id and latest update, so a poll that
+    # has already seen the current state costs three index lookups and no render.
+    max_id, rev, last_update = ticket_store.get_version()
+    etag = f"{max_id or 0}-{rev or 0}"
+    last_modified = None
+    if last_update:
+        last_modified = datetime.strptime(last_update, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    return etag, last_modified
+
+def conditional_response(build):
+    etag, last_modified = ticket_validators()
+    # Only the ETag decides. Last-Modified has one-second resolution, so If-Modified-Since
+    # would answer 304 to a client whose copy predates a change made in that same second.
+    fresh = bool(request.if_none_match) and request.if_none_match.contains(etag)
+
+    response = make_response('', 304) if fresh else make_response(build())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True  # always revalidate, never serve stale tickets
+    return response
+
 @app.route('/dashboard')
 def view_dashboard():
-    conn = sqlite3.connect('apartment.db')
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM tickets ORDER BY id DESC")
-    rows = c.fetchall()
-    conn.close()
-    return render_template('dashboard.html', tickets=rows)
+    query, error = parse_ticket_query()
+    if error:
+        return error, 400
+
+    def build():
+        # Read the feed position first so no event between the two reads is lost.
+        last_event_id = ticket_store.event_range()[1] or 0
+        rows = ticket_store.list_tickets(**query)
+        next_args = next_page_args(query, rows)
+        next_url = url_for('view_dashboard', **next_args) if next_args else None
+        return render_template('dashboard.html', tickets=rows, next_url=next_url,
+                               stream_url=url_for('ticket_stream', last_event_id=last_event_id),
+                               stream_retry_ms=STREAM_BUSY_RETRY * 1000,
+                               live_insert=query['before_id'] is None and not query['until'],
+                               filters={key: query[key] for key in ('status', 'category') if query[key]})
+
+    return conditional_response(build)
 
 @app.route('/resolve/<int:ticket_id>', methods=['POST'])
 def resolve_ticket(ticket_id):
-    conn = sqlite3.connect('apartment.db')
-    c = conn.cursor()
-    c.execute("UPDATE tickets SET status = 'Resolved' WHERE id = ?", (ticket_id,))
-    conn.commit()
-    conn.close()
+    ticket_store.resolve_ticket(ticket_id)
     return redirect(url_for('view_dashboard'))
 
 @app.route('/tickets', methods=['GET'])
 def get_tickets():
-    conn = sqlite3.connect('apartment.db')
-    conn.row_factory = sqlite3.Row 
-    c = conn.cursor()
-    c.execute("SELECT * FROM tickets ORDER BY id DESC")
-    rows = c.fetchall()
-    tickets = [dict(row) for row in rows]
-    conn.close()
-    return jsonify(tickets)
+    query, error = parse_ticket_query()
+    if error:
+        return jsonify({"message": error, "status": "error"}), 400
+
+    def build():
+        rows = ticket_store.list_tickets(**query)
+        response = jsonify([dict(row) for row in rows])
+        next_args = next_page_args(query, rows)
+        if next_args:
+            response.headers['Link'] = f'<{url_for("get_tickets", **next_args)}>; rel="next"'
+        return response
+
+    return conditional_response(build)
+
+# --- Bulk Ingestion ---
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 500))
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 50000))
+BULK_MAX_TEXT = 2000
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+def bulk_item_text(item):
+    # Items are either {"text": "..."} or a bare string
+    if isinstance(item, bulk.BulkParseError):
+        raise item  # an NDJSON line that isn't valid JSON
+    text = item.get('text') if isinstance(item, dict) else item
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Item needs a non-empty 'text'")
+    if len(text) > BULK_MAX_TEXT:
+        raise ValueError(f"Text longer than {BULK_MAX_TEXT} characters")
+    return text
+
+def process_bulk_chunk(chunk, start, bypass_cache):
+    results = [None] * len(chunk)
+    valid = []
+    for offset, item in enumerate(chunk):
+        try:
+            valid.append((offset, bulk_item_text(item)))
+        except ValueError as e:
+            results[offset] = {"index": start + offset, "status": "error", "error": str(e)}
+
+    decisions = strict_privacy_check_many([text for _, text in valid], bypass_cache)
+    complaints, rows = [], []
+    for (offset, _), ai_data in zip(valid, decisions):
+        results[offset] = {"index": start + offset, "category": ai_data.get('category'), "tier": ai_data.get('tier')}
+        if ai_data.get('intent') == 'complaint':
+            complaints.append(offset)
+            rows.append((ai_data.get('category', 'General'), ai_data.get('text'), 'Open', ai_data.get('tier')))
+        else:
+            results[offset]["status"] = "private"
+
+    # One transaction per chunk; a failed chunk is reported, the rest still go in.
+    try:
+        ids = ticket_store.create_tickets(rows)
+    except sqlite3.Error as e:
+        for offset in complaints:
+            results[offset].update(status="error", error=f"Database error: {e}")
+    else:
+        for offset, ticket_id in zip(complaints, ids):
+            results[offset].update(status="created", ticket_id=ticket_id)
+    return results
+
+@app.route('/tickets/bulk', methods=['POST'])
+def bulk_upload():
+    if request.mimetype in NDJSON_TYPES:
+        items = bulk.iter_ndjson(request.stream)
+    elif request.mimetype == 'application/json':
+        items = bulk.iter_json_array(request.stream)
+    else:
+        return jsonify({"message": "Send application/json (array) or application/x-ndjson", "status": "error"}), 415
+
+    bypass_cache = cache_bypassed()
+    results, error, parse_errors = [], None, []
+    # Parsed, classified and inserted chunk by chunk; the body is never held whole.
+    for chunk in bulk.chunked(bulk.stop_at_error(items, parse_errors), BULK_CHUNK_SIZE):
+        if len(results) + len(chunk) > BULK_MAX_ITEMS:
+            error = f"Stopped after {len(results)} items (limit {BULK_MAX_ITEMS})"
+            break
+        results.extend(process_bulk_chunk(chunk, len(results), bypass_cache))
+    if parse_errors:
+        # Only a broken JSON array gets here; NDJSON reports bad lines per item.
+        if not results:
+            return jsonify({"message": str(parse_errors[0]), "status": "error"}), 400
+        # Items before the bad spot are saved; say where it stopped.
+        error = f"{parse_errors[0]} (after {len(results)} items)"
+
+    counts = Counter(result["status"] for result in results)
+    metrics.annotate(items=len(results), created=counts["created"], failed=counts["error"])
+    response = {
+        "message": "Processed",
+        "status": "partial" if error or counts["error"] else "success",
+        "created": counts["created"],
+        "private": counts["private"],
+        "failed": counts["error"],
+        "results": results,
+    }
+    if error:
+        response["error"] = error
+    return jsonify(response)
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    # Hit/miss counters are per worker; entry counts are shared.
+    return jsonify(result_cache.stats())
+
+@app.route('/batch/stats', methods=['GET'])
+def batch_stats():
+    # Batch sizes and queue wait for this worker's Gemini classification batches.
+    return jsonify(llm_batcher.stats())
+
+# --- Live Ticket Feed (SSE) ---
+STREAM_HEARTBEAT = 15  # seconds; keeps proxies from closing idle streams
+# Each open stream holds a gunicorn thread; past this many per worker new streams get
+# a 503 so requests always have threads left (gunicorn_config.py derives it from threads).
+MAX_STREAMS = int(os.environ.get("SSE_MAX_STREAMS", 96))
+STREAM_BUSY_RETRY = 30  # seconds before a turned-away dashboard tries again
+stream_slots = threading.BoundedSemaphore(MAX_STREAMS) if MAX_STREAMS else None
+
+@app.route('/tickets/stream')
+def ticket_stream():
+    # Browsers resend Last-Event-ID on reconnect; the first connect passes ?last_event_id=
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        cursor = int(last_event_id) if last_event_id else feed.latest_seq()
+    except ValueError:
+        return jsonify({"message": "Invalid Last-Event-ID", "status": "error"}), 400
+
+    if stream_slots is None or not stream_slots.acquire(blocking=False):
+        response = Response(f"retry: {STREAM_BUSY_RETRY * 1000}\n\n", status=503, mimetype='text/event-stream')
+        response.headers['Retry-After'] = str(STREAM_BUSY_RETRY)
+        return response
+
+    def stream(cursor):
+        yield "retry: 2000\n\n"
+        while True:
+            events = feed.wait(cursor, STREAM_HEARTBEAT)
+            if not events:
+                yield ": ping\n\n"
+                continue
+            for event in events:
+                cursor = event["seq"]
+                data = json.dumps(event.get("ticket", {}))
+                yield f"id: {cursor}\nevent: {event['type']}\ndata: {data}\n\n"
+
+    response = Response(stream_with_context(stream(cursor)), mimetype='text/event-stream')
+    response.call_on_close(stream_slots.release)  # the server closes it when the client goes away
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
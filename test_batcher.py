@@ -0,0 +1,84 @@
+import threading
+
+from batcher import ClassificationBatcher
+
+
+def classify_all(batcher, texts):
+    results = [None] * len(texts)
+
+    def run(i):
+        results[i] = batcher.classify(texts[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_requests_share_one_call():
+    batches, singles = [], []
+
+    def send_batch(texts):
+        batches.append(texts)
+        return [{"item": i, "category": "Plumbing", "text": f"Issue: {t}"} for i, t in enumerate(texts, 1)]
+
+    def send_one(text):
+        singles.append(text)
+        return {"category": "Plumbing", "text": f"Issue: {text}"}
+
+    batcher = ClassificationBatcher(send_batch, send_one, window_ms=200, max_size=8)
+    texts = [f"leak {i}" for i in range(8)]
+    results = classify_all(batcher, texts)
+
+    assert [r["text"] for r in results] == [f"Issue: {t}" for t in texts]
+    assert sum(len(b) for b in batches) + len(singles) == 8
+    assert len(batches) + len(singles) < 8
+    stats = batcher.stats()
+    assert stats["items"] == 8
+    assert stats["avg_batch_size"] > 1
+
+
+def test_unparseable_batch_falls_back_to_single_calls():
+    singles = []
+
+    def send_one(text):
+        singles.append(text)
+        return {"category": "Cleaning", "text": f"Issue: {text}"}
+
+    batcher = ClassificationBatcher(lambda texts: [{"category": "Cleaning"}], send_one,
+                                    window_ms=200, max_size=4)
+    results = classify_all(batcher, [f"garbage {i}" for i in range(4)])
+
+    assert [r["text"] for r in results] == [f"Issue: garbage {i}" for i in range(4)]
+    assert sorted(singles) == [f"garbage {i}" for i in range(4)]
+    assert batcher.stats()["fallbacks"] >= 1
+
+
+def test_batch_answers_are_matched_by_item_number():
+    singles = []
+
+    def send_batch(texts):
+        # Reordered, item 2 missing, and a stray number that matches nothing
+        answers = [{"item": i, "category": text} for i, text in enumerate(texts, 1) if i != 2]
+        return answers[::-1] + [{"item": 99, "category": "junk"}]
+
+    def send_one(text):
+        singles.append(text)
+        return {"category": text}
+
+    batcher = ClassificationBatcher(send_batch, send_one, window_ms=200, max_size=4)
+    texts = ["Plumbing", "Electrical", "Security", "Cleaning"]
+    results = batcher.classify_many(texts)
+
+    assert results == [{"category": t} for t in texts]
+    assert singles == ["Electrical"]
+    assert batcher.stats()["fallbacks"] == 1
+
+
+if __name__ == '__main__':
+    test_concurrent_requests_share_one_call()
+    test_unparseable_batch_falls_back_to_single_calls()
+    test_batch_answers_are_matched_by_item_number()
+    print("✅ Batching and per-item fallback work")
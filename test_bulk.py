@@ -0,0 +1,60 @@
+import io
+import json
+
+import bulk
+import ticket_store
+
+
+def test_json_array_is_parsed_across_read_boundaries():
+    items = [{"text": f"leak in flat {i} – ബി ബ്ലോക്ക്"} for i in range(300)] + ["bare string", 12345]
+    read_size, bulk.READ_SIZE = bulk.READ_SIZE, 7   # force items and characters to straddle reads
+    try:
+        assert list(bulk.iter_json_array(io.BytesIO(json.dumps(items).encode()))) == items
+    finally:
+        bulk.READ_SIZE = read_size
+
+    for bad in (b'{"text": "x"}', b'[1 2]', b'[1,]', b'["a",'):
+        try:
+            list(bulk.iter_json_array(io.BytesIO(bad)))
+            raise AssertionError(f"{bad!r} should not parse")
+        except bulk.BulkParseError:
+            pass
+
+
+def test_ndjson_and_chunking():
+    body = b'{"text": "a"}\n\n"b"\n{"text": "c"}\n'
+    items = list(bulk.iter_ndjson(io.BytesIO(body)))
+    assert items == [{"text": "a"}, "b", {"text": "c"}]
+    assert list(bulk.chunked(items, 2)) == [[{"text": "a"}, "b"], [{"text": "c"}]]
+
+    # A bad or oversized line becomes an error item and the lines after it are still read
+    body = b'"a"\n{bad\n' + b'"' + b'x' * bulk.MAX_ITEM_BYTES + b'"\n"b"\n'
+    items = list(bulk.iter_ndjson(io.BytesIO(body)))
+    assert [type(item) for item in items] == [str, bulk.BulkParseError, bulk.BulkParseError, str]
+    assert str(items[1]).startswith("Line 2:") and items[3] == "b"
+
+
+def test_broken_array_keeps_the_items_before_the_error():
+    errors = []
+    items = list(bulk.stop_at_error(bulk.iter_json_array(io.BytesIO(b'["a", "b", {bad')), errors))
+    assert items == ["a", "b"]
+    assert len(errors) == 1 and isinstance(errors[0], bulk.BulkParseError)
+
+
+def test_create_tickets_returns_consecutive_ids_and_events(db):
+    first = ticket_store.create_ticket("Plumbing", "Issue: leak")
+    ids = ticket_store.create_tickets([("Cleaning", f"Issue: garbage {i}", "Open", "keyword") for i in range(5)])
+    assert ids == list(range(first + 1, first + 6))
+    rows = {row["id"]: row for row in ticket_store.list_tickets()}
+    assert rows[ids[-1]]["description"] == "Issue: garbage 4"
+    assert [e["id"] for e in ticket_store.events_since(1)] == ids
+
+
+if __name__ == '__main__':
+    test_json_array_is_parsed_across_read_boundaries()
+    test_ndjson_and_chunking()
+    test_broken_array_keeps_the_items_before_the_error()
+    from conftest import temp_db
+    with temp_db() as db:
+        test_create_tickets_returns_consecutive_ids_and_events(db)
+    print("✅ Bulk parsing and batched inserts work")
@@ -0,0 +1,54 @@
+import time
+
+import ticket_store
+import classifier
+
+
+def test_keyword_tier_is_word_boundary_aware():
+    engine = classifier.TieredClassifier()
+    engine.trained_at, engine.model = time.time(), None  # no history: model tier stays empty
+
+    assert engine.classify("Please call 101")["intent"] == "private"
+    assert engine.classify("message the guard")["action"] == "message"
+    # Everything the baseline substring rule treated as private still is
+    for text in ("I phoned 101", "I messaged 202", "phoning the guard", "messaging 303", "calls to 404",
+                 "called the secretary", "contact 505", "connecting me to 606", "ring 707", "rang the gate",
+                 "talk to 808", "talked to the guard", "please telephone 909", "PHONE 111"):
+        assert engine.classify(text)["intent"] == "private", text
+
+    # Substrings of private words no longer make a complaint private
+    decision = engine.classify("Water leaking during the night, the pipe is broken")
+    assert decision["intent"] == "complaint"
+    assert decision["category"] == "Plumbing"
+    assert decision["tier"] == classifier.TIER_KEYWORD
+
+    # Mixed signals stay below the threshold and fall through to Gemini
+    assert engine.classify("garbage near the gate") is None
+    assert engine.classify("the lift is making a strange noise") is None
+
+    # A lone incidental keyword doesn't decide the category either
+    for text in ("Smell of gas near the kitchen", "Lift is stuck with people inside, alarm not working"):
+        assert engine.classify(text) is None, text
+
+
+def test_model_tier_learns_from_llm_labelled_tickets(db):
+    for _ in range(6):
+        ticket_store.create_ticket("Emergency", "Issue: the elevator is stuck between floors", tier=classifier.TIER_LLM)
+        ticket_store.create_ticket("Complaint", "Issue: neighbours playing loud music late", tier=classifier.TIER_LLM)
+    # Local guesses are not used as training labels
+    ticket_store.create_ticket("Cleaning", "Issue: the elevator is stuck", tier=classifier.TIER_MODEL)
+
+    engine = classifier.TieredClassifier(model_threshold=0.8)
+    decision = engine.classify("elevator stuck again")
+    assert decision["tier"] == classifier.TIER_MODEL
+    assert decision["category"] == "Emergency"
+    assert decision["confidence"] >= 0.8
+    assert set(engine.model.doc_counts) == {"Emergency", "Complaint"}
+
+
+if __name__ == '__main__':
+    test_keyword_tier_is_word_boundary_aware()
+    from conftest import temp_db
+    with temp_db() as db:
+        test_model_tier_learns_from_llm_labelled_tickets(db)
+    print("✅ Keyword and model tiers classify as expected")
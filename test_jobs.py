@@ -0,0 +1,97 @@
+import os
+import time
+import threading
+
+import pytest
+
+import jobs
+
+
+def wait_for(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get_job(job_id)
+        if job["status"] in (jobs.DONE, jobs.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_retry_then_finish_and_clean_up(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF", 0.01)
+    jobs.init_jobs()
+
+    audio = os.path.join(os.path.dirname(db), "clip.m4a")
+    open(audio, "wb").write(b"fake audio")
+    calls = []
+
+    def flaky(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise RuntimeError("503 from Gemini")
+        return {"intent": "complaint", "category": "Plumbing"}
+
+    job = wait_for(jobs.submit(flaky, audio))
+    assert job["status"] == jobs.DONE
+    assert job["attempts"] == 2
+    assert job["result"]["category"] == "Plumbing"
+    assert not os.path.exists(audio)
+
+    def broken(path):
+        raise RuntimeError("bad audio")
+
+    failed = wait_for(jobs.submit(broken, audio))
+    assert failed["status"] == jobs.FAILED
+    assert failed["attempts"] == jobs.JOB_MAX_ATTEMPTS
+    assert jobs.delete_job(failed["id"]) is True
+    assert jobs.get_job(failed["id"]) is None
+
+
+def test_database_errors_fail_the_job_instead_of_leaving_it_running(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF", 0.01)
+    jobs.init_jobs()
+
+    unsaveable = wait_for(jobs.submit(lambda path: {"when": object()}, "missing.m4a"))
+    assert unsaveable["status"] == jobs.FAILED
+    assert "Could not save the result" in unsaveable["error"]
+
+    start_attempt = jobs.START_ATTEMPT
+    jobs.START_ATTEMPT = "UPDATE no_such_table SET attempts = 1 WHERE id = ?"  # every start write fails
+    try:
+        failed = wait_for(jobs.submit(lambda path: {}, "missing.m4a"))
+    finally:
+        jobs.START_ATTEMPT = start_attempt
+    assert failed["status"] == jobs.FAILED
+    assert "no_such_table" in failed["error"]
+    assert jobs.delete_job(failed["id"]) is True
+
+
+def test_queue_is_bounded(db):
+    jobs.init_jobs()
+    release = threading.Event()
+    held = []
+    try:
+        # Fill every slot with a job that blocks until released
+        for _ in range(jobs.JOB_QUEUE_SIZE):
+            held.append(jobs.submit(lambda path: release.wait(5) and {}, "missing.m4a"))
+        try:
+            jobs.submit(lambda path: {}, "missing.m4a")
+            raise AssertionError("queue should be full")
+        except jobs.QueueFull:
+            pass
+        assert jobs.delete_job(held[0]) is False  # still queued/running
+    finally:
+        release.set()
+    for job_id in held:
+        wait_for(job_id)
+
+
+if __name__ == '__main__':
+    from conftest import temp_db
+    for test in (test_jobs_retry_then_finish_and_clean_up,
+                 test_database_errors_fail_the_job_instead_of_leaving_it_running):
+        with temp_db() as db, pytest.MonkeyPatch.context() as monkeypatch:
+            test(db, monkeypatch)
+    with temp_db() as db:
+        test_queue_is_bounded(db)
+    print("✅ Jobs retry, finish, clean up and stay bounded")
@@ -0,0 +1,67 @@
+import json
+import time
+
+import ticket_store
+import metrics
+
+
+def parse(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_histograms_merge_across_workers_into_prometheus_text(db):
+    metrics.init_metrics()
+
+    metrics.observe("society_stage_duration_seconds", 0.003, stage="gemini_upload")
+    metrics.observe("society_stage_duration_seconds", 2.0, stage="gemini_upload")
+    metrics.inc("society_classification_total", tier="keyword")
+    ours = metrics.snapshot()
+
+    # Pretend another gunicorn worker flushed the same numbers
+    with metrics._metrics_db(write=True) as conn:
+        conn.execute(metrics.UPSERT_SNAPSHOT, ("other-worker", json.dumps(ours), time.time()))
+
+    text = metrics.render_prometheus()
+    assert "# TYPE society_stage_duration_seconds histogram" in text
+    lines = parse(text)
+    upload = '{stage="gemini_upload"'
+    assert int(lines[f'society_stage_duration_seconds_count{upload}}}']) >= 4
+    assert int(lines[f'society_stage_duration_seconds_bucket{upload},le="0.005"}}']) >= 2
+    assert int(lines[f'society_stage_duration_seconds_bucket{upload},le="+Inf"}}']) >= 4
+    assert int(lines['society_classification_total{tier="keyword"}']) >= 2
+
+
+def test_flush_skips_unchanged_snapshots_and_keeps_dead_workers_totals(db):
+    metrics.init_metrics()
+    metrics.inc("society_classification_total", tier="model")
+    metrics.flush()
+
+    # Snapshots live in their own file: flushing never touches the ticket database
+    watcher = ticket_store.connect()
+    version = watcher.execute("PRAGMA data_version").fetchone()[0]
+    assert metrics.flush() is False   # nothing changed, nothing written
+    metrics.inc("society_classification_total", tier="model")
+    assert metrics.flush() is True
+    assert watcher.execute("PRAGMA data_version").fetchone()[0] == version
+    watcher.close()
+
+    # A worker that died an hour ago: its totals stay in the output
+    dead = {"histograms": [], "counters": [["society_classification_total", [["tier", "model"]], 5]]}
+    with metrics._metrics_db(write=True) as conn:
+        conn.execute(metrics.UPSERT_SNAPSHOT, ("dead-worker", json.dumps(dead), time.time() - metrics.METRICS_STALE_AFTER - 1))
+    before = int(parse(metrics.render_prometheus())['society_classification_total{tier="model"}'])
+    metrics.inc("society_classification_total", tier="model")
+    after = int(parse(metrics.render_prometheus())['society_classification_total{tier="model"}'])
+    assert after == before + 1
+    with metrics._metrics_db() as conn:
+        workers = {row["worker"] for row in conn.execute("SELECT worker FROM metrics_snapshots")}
+    assert workers == {metrics.worker_id(), metrics.RETIRED}
+
+
+if __name__ == '__main__':
+    from conftest import temp_db
+    for test in (test_histograms_merge_across_workers_into_prometheus_text,
+                 test_flush_skips_unchanged_snapshots_and_keeps_dead_workers_totals):
+        with temp_db() as db:
+            test(db)
+    print("✅ Metrics merge across workers and render as Prometheus text")
@@ -0,0 +1,74 @@
+
+import sqlite3
+
+import ticket_store
+import result_cache
+
+
+def test_hit_miss_ttl_and_lru_eviction(db):
+    result_cache.init_cache()
+
+    key = result_cache.text_key("Water leaking in B-block lift.")
+    assert key == result_cache.text_key("  water leaking in  b-block LIFT ")
+    assert result_cache.get(result_cache.CLASSIFY, key) is None
+
+    value = {"intent": "complaint", "category": "Plumbing", "text": "Issue: water leaking in B-block lift"}
+    result_cache.put(result_cache.CLASSIFY, key, value)
+    assert result_cache.get(result_cache.CLASSIFY, key) == value
+    assert result_cache.get(result_cache.CLASSIFY, key, bypass=True) is None
+
+    # Expired entries are ignored
+    ttl = result_cache.CACHE_TTL
+    result_cache.CACHE_TTL = -1
+    try:
+        assert result_cache.get(result_cache.CLASSIFY, key) is None
+    finally:
+        result_cache.CACHE_TTL = ttl
+
+    # Least recently used entries go first once the namespace is full
+    limit = result_cache.CACHE_MAX_ENTRIES
+    result_cache.CACHE_MAX_ENTRIES = 3
+    try:
+        for i in range(5):
+            result_cache.put(result_cache.TRANSCRIBE, f"clip-{i}", f"text {i}")
+        assert result_cache.get(result_cache.TRANSCRIBE, "clip-0") is None
+        assert result_cache.get(result_cache.TRANSCRIBE, "clip-4") == "text 4"
+    finally:
+        result_cache.CACHE_MAX_ENTRIES = limit
+
+    stats = result_cache.stats()["namespaces"]
+    assert stats[result_cache.TRANSCRIBE]["entries"] == 3
+    assert stats[result_cache.CLASSIFY]["hits"] >= 1
+    assert stats[result_cache.CLASSIFY]["bypassed"] >= 1
+
+
+def test_database_errors_are_a_miss_not_a_failure(db):
+    result_cache.init_cache()
+    key = result_cache.text_key("garbage not collected")
+    result_cache.put(result_cache.CLASSIFY, key, {"category": "Cleaning"})
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    connection, transaction, touch = ticket_store.connection, ticket_store.transaction, result_cache.TOUCH_INTERVAL
+    try:
+        # Only writes fail: the hit is still served even though last_used can't be updated
+        ticket_store.transaction, result_cache.TOUCH_INTERVAL = locked, -1
+        assert result_cache.get(result_cache.CLASSIFY, key) == {"category": "Cleaning"}
+        result_cache.put(result_cache.CLASSIFY, "other", {"category": "Plumbing"})  # skipped, no raise
+
+        # Reads fail too: a miss
+        ticket_store.connection = locked
+        assert result_cache.get(result_cache.CLASSIFY, key) is None
+    finally:
+        ticket_store.connection, ticket_store.transaction, result_cache.TOUCH_INTERVAL = connection, transaction, touch
+    assert result_cache.get(result_cache.CLASSIFY, key) == {"category": "Cleaning"}
+    assert result_cache.get(result_cache.CLASSIFY, "other") is None
+
+
+if __name__ == '__main__':
+    from conftest import temp_db
+    for test in (test_hit_miss_ttl_and_lru_eviction, test_database_errors_are_a_miss_not_a_failure):
+        with temp_db() as db:
+            test(db)
+    print("✅ Result cache hit/miss, TTL and eviction behave as expected")
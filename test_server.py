@@ -0,0 +1,198 @@
+import io
+import json
+import re
+import time
+import threading
+import types
+from datetime import datetime, timedelta, timezone
+
+from conftest import server_client  # first: points DB_PATH at a temp file before server is imported
+import jobs
+import server
+import ticket_store
+from ticket_feed import TicketFeed
+
+
+def test_tickets_pages_and_revalidates(client):
+    ids = [ticket_store.create_ticket("Plumbing", f"Issue: leak {i}") for i in range(5)]
+
+    first = client.get("/tickets?limit=2")
+    assert [t["id"] for t in first.get_json()] == ids[::-1][:2]
+    next_url = first.headers["Link"].split(">")[0].lstrip("<")
+    assert f"before_id={ids[3]}" in next_url
+    assert [t["id"] for t in client.get(next_url).get_json()] == ids[::-1][2:4]
+    assert "Link" not in client.get("/tickets?limit=10").headers
+
+    # Unchanged -> 304; a resolve in the same second still changes the ETag
+    etag = first.headers["ETag"]
+    assert client.get("/tickets?limit=2", headers={"If-None-Match": etag}).status_code == 304
+    ticket_store.resolve_ticket(ids[0])
+    assert client.get("/tickets?limit=2", headers={"If-None-Match": etag}).status_code == 200
+    # If-Modified-Since alone is too coarse to answer 304
+    modified = client.get("/tickets?limit=2", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert modified.status_code == 200
+
+    page = client.get("/dashboard")
+    assert page.status_code == 200 and b"leak 4" in page.data
+    assert client.get("/dashboard", headers={"If-None-Match": page.headers["ETag"]}).status_code == 304
+
+
+def test_since_and_until_honour_utc_offsets(client):
+    ticket_store.create_ticket("Plumbing", "Issue: leak")
+    # A minute ago, written in IST: taken as 5.5 h in the future if the offset is dropped
+    since = (datetime.now(timezone.utc) - timedelta(minutes=1)).astimezone(timezone(timedelta(hours=5, minutes=30)))
+    assert len(client.get("/tickets", query_string={"since": since.isoformat()}).get_json()) == 1
+    assert client.get("/tickets", query_string={"until": since.isoformat()}).get_json() == []
+    assert client.get("/tickets?since=yesterday").status_code == 400
+    # UTC written with a trailing Z (rejected by fromisoformat before Python 3.11)
+    since = (datetime.now(timezone.utc) - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    assert len(client.get("/tickets", query_string={"since": since}).get_json()) == 1
+    assert client.get("/tickets", query_string={"until": since}).get_json() == []
+
+
+def test_cache_hit_keeps_the_submitted_wording(client):
+    client.post("/upload_text", json={"text": "The lift is STUCK on floor 3"})
+    reply = client.post("/upload_text", json={"text": "the lift is stuck on floor 3!!"}).get_json()
+    assert '"tier": "cache"' in reply["ai_response"]
+    descriptions = [t["description"] for t in client.get("/tickets").get_json()]
+    assert descriptions == ["Issue: the lift is stuck on floor 3!!", "Issue: The lift is STUCK on floor 3"]
+    assert client.get("/cache/stats").get_json()["namespaces"]["classify"]["hits"] >= 1
+
+
+def test_private_requests_never_reach_the_dashboard(client):
+    for text in ("I phoned 101", "I messaged 202"):
+        reply = client.post("/upload_text", json={"text": text}).get_json()
+        assert '"intent": "private"' in reply["ai_response"]
+    assert client.get("/tickets").get_json() == []
+
+
+def test_async_audio_job_can_be_polled_and_deleted(client):
+    upload = client.post("/upload_audio?async=1", data={"audio": (io.BytesIO(b"voice note"), "note.m4a")})
+    assert upload.status_code == 202
+    status_url = upload.get_json()["status_url"]
+    assert upload.headers["Location"] == status_url
+
+    deadline = time.time() + 5
+    job = client.get(status_url).get_json()
+    while job["status"] not in (jobs.DONE, jobs.FAILED) and time.time() < deadline:
+        time.sleep(0.01)
+        job = client.get(status_url).get_json()
+    assert job["status"] == jobs.DONE
+    assert '"intent"' in job["ai_response"]
+
+    assert client.delete(status_url).status_code == 200
+    assert client.get(status_url).status_code == 404
+    assert client.delete(status_url).status_code == 404
+
+
+def test_audio_replies_without_json_or_category_still_make_tickets(client):
+    class Reply:
+        def __init__(self, text):
+            self.text = text
+
+        def generate_content(self, contents):
+            return types.SimpleNamespace(text=self.text)
+
+    # Not JSON: the reply is the transcript, classified by the usual tiers
+    server.model = Reply("Water leaking from the ceiling, the pipe is broken")
+    reply = client.post("/upload_audio", data={"audio": (io.BytesIO(b"plain"), "a.m4a")})
+    assert reply.status_code == 200
+    assert json.loads(reply.get_json()["ai_response"])["category"] == "Plumbing"
+
+    # Transcript but no classification: stored as a General ticket
+    server.model = Reply('{"transcript": "the lift is making a strange noise"}')
+    reply = client.post("/upload_audio", data={"audio": (io.BytesIO(b"partial"), "b.m4a")})
+    assert reply.status_code == 200
+    assert json.loads(reply.get_json()["ai_response"])["tier"] == "fallback"
+
+    assert [(t["category"], t["description"]) for t in client.get("/tickets").get_json()] == [
+        ("General", "the lift is making a strange noise"),
+        ("Plumbing", "Issue: Water leaking from the ceiling, the pipe is broken")]
+
+
+def test_bulk_reports_bad_lines_per_item(client):
+    chunk_size, server.BULK_CHUNK_SIZE = server.BULK_CHUNK_SIZE, 3
+    try:
+        lines = [json.dumps({"text": f"garbage near tower {i}"}) for i in range(5)] + ["{bad", '"water leaking in flat 7"']
+        reply = client.post("/tickets/bulk", data="\n".join(lines), content_type="application/x-ndjson").get_json()
+        assert (reply["created"], reply["failed"], reply["status"]) == (6, 1, "partial")
+        assert reply["results"][5]["index"] == 5 and reply["results"][5]["status"] == "error"
+        assert reply["results"][6]["status"] == "created" and "error" not in reply
+
+        # A bad first line doesn't reject the whole upload either
+        reply = client.post("/tickets/bulk", data='[oops\n"power cut in C-block"',
+                            content_type="application/x-ndjson").get_json()
+        assert (reply["created"], reply["failed"]) == (1, 1)
+
+        # A broken array stops there, but what came before it is saved
+        reply = client.post("/tickets/bulk", data='["garbage in lobby", {"text": "leak in lift"}, {bad',
+                            content_type="application/json").get_json()
+        assert reply["created"] == 2 and "after 2 items" in reply["error"]
+        assert client.post("/tickets/bulk", data="{bad", content_type="application/json").status_code == 400
+    finally:
+        server.BULK_CHUNK_SIZE = chunk_size
+    assert len(client.get("/tickets").get_json()) == 9
+
+
+def test_reordered_batch_answers_keep_each_ticket_its_own_category(client):
+    class Reversed:
+        # Answers the numbered batch back to front, echoing the wrong text
+        def generate_content(self, prompt):
+            items = re.findall(r'^\s*(\d+)\. ', prompt, re.M)
+            answer = [{"item": int(n), "intent": "complaint", "category": f"Category {n}", "text": "Issue: ?"}
+                      for n in reversed(items)]
+            return types.SimpleNamespace(text=json.dumps(answer))
+
+    server.model = Reversed()
+    texts = [f"the lift in block {i} is making a strange noise" for i in (1, 2, 3)]
+    reply = client.post("/tickets/bulk", json=texts).get_json()
+    assert reply["created"] == 3
+    tickets = sorted((t["description"], t["category"]) for t in client.get("/tickets").get_json())
+    assert tickets == [(f"Issue: {text}", f"Category {n}") for n, text in enumerate(texts, 1)]
+
+
+def test_metrics_page_counts_requests(client):
+    client.get("/tickets")
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE society_request_duration_seconds histogram" in text
+    assert 'society_request_duration_seconds_count{endpoint="get_tickets",method="GET",status="200"}' in text
+
+
+def test_stream_delivers_events_and_is_capped_per_worker(client):
+    assert client.get("/tickets/stream", headers={"Last-Event-ID": "abc"}).status_code == 400
+
+    feed, slots = server.feed, server.stream_slots
+    server.feed, server.stream_slots = TicketFeed(poll_interval=0.01), threading.BoundedSemaphore(1)
+    try:
+        stream = client.get("/tickets/stream", buffered=False)
+        assert stream.status_code == 200
+        chunks = stream.response
+        assert next(chunks) == b"retry: 2000\n\n"
+        ticket_id = ticket_store.create_ticket("Electrical", "Issue: no power")
+        event = next(chunks).decode()
+        assert "event: created" in event and f'"id": {ticket_id}' in event
+
+        # The only slot is taken: the next dashboard is told to come back later
+        busy = client.get("/tickets/stream")
+        assert busy.status_code == 503
+        assert busy.headers["Retry-After"] == str(server.STREAM_BUSY_RETRY)
+        assert busy.data.startswith(b"retry: ")
+
+        stream.close()  # client went away: its slot is free again
+        again = client.get("/tickets/stream", buffered=False)
+        assert again.status_code == 200
+        again.close()
+    finally:
+        server.feed, server.stream_slots = feed, slots
+
+
+if __name__ == '__main__':
+    for test in (test_tickets_pages_and_revalidates, test_since_and_until_honour_utc_offsets,
+                 test_cache_hit_keeps_the_submitted_wording, test_private_requests_never_reach_the_dashboard,
+                 test_async_audio_job_can_be_polled_and_deleted,
+                 test_audio_replies_without_json_or_category_still_make_tickets, test_bulk_reports_bad_lines_per_item,
+                 test_reordered_batch_answers_keep_each_ticket_its_own_category,
+                 test_metrics_page_counts_requests, test_stream_delivers_events_and_is_capped_per_worker):
+        with server_client() as client:
+            test(client)
+    print("✅ Server routes behave as expected")
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import threading
+from multiprocessing import get_context
+
+import ticket_store
+from ticket_feed import TicketFeed
+
+# Mimics gunicorn: several worker processes, each with writer and reader threads,
+# all hitting the same SQLite file at once.
+PROCESSES = 4
+WRITERS = 4
+READERS = 4
+WRITES_PER_THREAD = 50
+
+
+def _worker(db_path, errors):
+    ticket_store.DB_PATH = db_path
+    failures = []
+
+    def writer(n):
+        try:
+            for i in range(WRITES_PER_THREAD):
+                ticket_id = ticket_store.create_ticket("Plumbing", f"leak {os.getpid()}-{n}-{i}")
+                if i % 5 == 0:
+                    ticket_store.resolve_ticket(ticket_id)
+        except sqlite3.Error as e:
+            failures.append(repr(e))
+
+    def reader():
+        try:
+            for _ in range(WRITES_PER_THREAD):
+                ticket_store.list_tickets()
+        except sqlite3.Error as e:
+            failures.append(repr(e))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    errors.extend(failures)
+
+
+def test_concurrent_writers_and_readers(db):
+    ticket_store.close()
+
+    # spawn, not fork: earlier tests leave threads (metrics flusher, feed poller, pools)
+    # that may hold a lock at the moment of a fork.
+    ctx = get_context("spawn")
+    with ctx.Manager() as manager:
+        errors = manager.list()
+        procs = [ctx.Process(target=_worker, args=(db, errors)) for _ in range(PROCESSES)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        errors = list(errors)
+
+    assert errors == [], errors
+    assert all(p.exitcode == 0 for p in procs)
+
+    rows = ticket_store.list_tickets()
+    assert len(rows) == PROCESSES * WRITERS * WRITES_PER_THREAD
+    resolved = [r for r in rows if r["status"] == "Resolved"]
+    assert len(resolved) == PROCESSES * WRITERS * (WRITES_PER_THREAD // 5)
+    with ticket_store.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_pool_is_bounded_and_reentrant(db):
+    pool_size, ticket_store.POOL_SIZE = ticket_store.POOL_SIZE, 2
+    ticket_store.close()
+    try:
+        with ticket_store.connection() as outer, ticket_store.connection() as inner:
+            assert inner is outer  # nested use in one thread takes no second slot
+
+        seen, lock = set(), threading.Lock()
+
+        def work(n):
+            for i in range(20):
+                with ticket_store.connection() as conn:
+                    with lock:
+                        seen.add(id(conn))
+                ticket_store.create_ticket("Plumbing", f"leak {n}-{i}")
+                ticket_store.list_tickets(limit=5)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(seen) <= 2
+        assert len(ticket_store.list_tickets()) == 160
+    finally:
+        ticket_store.close()
+        ticket_store.POOL_SIZE = pool_size
+
+
+def test_keyset_pagination_and_version(db):
+    ids = [ticket_store.create_ticket("Plumbing" if i % 2 else "Cleaning", f"issue {i}") for i in range(10)]
+
+    page = ticket_store.list_tickets(limit=4)
+    assert [r["id"] for r in page] == ids[::-1][:4]
+    page = ticket_store.list_tickets(before_id=page[-1]["id"], limit=4)
+    assert [r["id"] for r in page] == ids[::-1][4:8]
+
+    plumbing = ticket_store.list_tickets(category="Plumbing", status="Open")
+    assert [r["id"] for r in plumbing] == ids[1::2][::-1]
+
+    version = ticket_store.get_version()
+    assert version[0] == ids[-1]
+    ticket_store.resolve_ticket(ids[0])
+    assert ticket_store.get_version() != version
+
+
+def test_change_feed_delivers_and_resumes(db):
+    feed = TicketFeed(poll_interval=0.01)
+    cursor = feed.latest_seq()
+
+    ticket_id = ticket_store.create_ticket("Electrical", "no power in C-block")
+    ticket_store.resolve_ticket(ticket_id)
+    events = feed.wait(cursor, timeout=2)
+    while len(events) < 2:
+        events += feed.wait(events[-1]["seq"], timeout=2)
+    assert [e["type"] for e in events] == ["created", "resolved"]
+    assert events[0]["ticket"]["id"] == ticket_id
+
+    # Resuming from an id older than the pruned log asks the client to reload.
+    with ticket_store.transaction() as conn:
+        conn.execute("DELETE FROM ticket_events WHERE seq = ?", (events[0]["seq"],))
+    feed._events.clear()
+    assert feed.wait(cursor, timeout=0)[0]["type"] == "reset"
+
+    # An id beyond the newest event (database restored under an open dashboard) resets too
+    assert feed.wait(events[-1]["seq"] + 100, timeout=0)[0]["type"] == "reset"
+    with ticket_store.transaction() as conn:
+        conn.execute("DELETE FROM ticket_events")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'ticket_events'")
+    ticket_id = ticket_store.create_ticket("Cleaning", "garbage in the lobby")
+    events = feed.wait(0, timeout=2)
+    assert [(e["type"], e["ticket"]["id"]) for e in events] == [("created", ticket_id)]
+
+
+if __name__ == '__main__':
+    from conftest import temp_db
+    for test in (test_concurrent_writers_and_readers, test_pool_is_bounded_and_reentrant,
+                 test_keyset_pagination_and_version,
+                 test_change_feed_delivers_and_resumes):
+        with temp_db() as db:
+            test(db)
+    print("✅ Concurrent writers and readers finished without lock errors")
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from collections import deque
+
+import ticket_store
+
+# ==========================================
+# 📡 TICKET CHANGE FEED
+# One poller thread per worker watches the ticket_events change log and
+# wakes every open /tickets/stream connection in that worker. Idle cost is a
+# PRAGMA data_version check (no disk read) per poll, however many dashboards
+# are open; events written by the other gunicorn worker show up the same way.
+# ==========================================
+POLL_INTERVAL = float(os.environ.get("FEED_POLL_INTERVAL", 0.25))
+BUFFER_SIZE = 1000
+
+
+class TicketFeed:
+    def __init__(self, poll_interval=POLL_INTERVAL, buffer_size=BUFFER_SIZE):
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=buffer_size)
+        self._last_seq = 0
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        with self._cond:
+            # Started lazily so each forked worker gets its own poller.
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._events.clear()
+            self._last_seq = ticket_store.event_range()[1] or 0
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="ticket-feed", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        # Dedicated connection: data_version only moves when *another* connection commits,
+        # which is every writer, in this process or the other worker.
+        conn = ticket_store.connect()
+        version = None
+        while True:
+            try:
+                current = conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != version:
+                    version = current
+                    self._pull(conn)
+            except Exception as e:
+                print(f"Feed Error: {e}")
+            time.sleep(self.poll_interval)
+
+    def _pull(self, conn):
+        pulled = False
+        while True:
+            rows = ticket_store.events_since(self._last_seq, conn=conn)
+            if not rows:
+                if not pulled and (ticket_store.event_range(conn)[1] or 0) < self._last_seq:
+                    # The log went backwards (database restored or recreated): follow it.
+                    with self._cond:
+                        self._events.clear()
+                        self._last_seq = ticket_store.event_range(conn)[1] or 0
+                return
+            pulled = True
+            with self._cond:
+                self._events.extend(event_from_row(row) for row in rows)
+                self._last_seq = rows[-1]["seq"]
+                self._cond.notify_all()
+
+    def latest_seq(self):
+        self._ensure_started()
+        return self._last_seq
+
+    def wait(self, cursor, timeout):
+        # Events with seq > cursor, blocking up to `timeout` seconds for new ones.
+        self._ensure_started()
+        if cursor > self._last_seq:
+            # Ahead of this worker's feed: either the poller hasn't caught up yet, or the
+            # client's id comes from a log that no longer exists and it has to reload.
+            newest = ticket_store.event_range()[1] or 0
+            if cursor > newest:
+                return [{"seq": newest, "type": "reset"}]
+        with self._cond:
+            self._cond.wait_for(lambda: self._last_seq > cursor, timeout)
+            if self._last_seq <= cursor:
+                return []
+            if self._events and cursor >= self._events[0]["seq"] - 1:
+                return [event for event in self._events if event["seq"] > cursor]
+
+        # Client is behind the in-memory window (long disconnect): catch up from the log.
+        oldest, newest = ticket_store.event_range()
+        if oldest is None or cursor < oldest - 1:
+            # Older events were pruned; the client has to reload its snapshot.
+            return [{"seq": newest or 0, "type": "reset"}]
+        return [event_from_row(row) for row in ticket_store.events_since(cursor)]
+
+
+def event_from_row(row):
+    event = dict(row)
+    event["ticket"] = {key: event.pop(key) for key in ("id", "category", "description", "status", "created_at")}
+    return event
+
+
+feed = TicketFeed()
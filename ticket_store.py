@@ -0,0 +1,272 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+# ==========================================
+# 🗄️ TICKET STORE
+# A small bounded pool of reused connections per worker (re-created after
+# a fork), WAL so the dashboard can read while a worker writes.
+# ==========================================
+DB_PATH = os.environ.get("DB_PATH", "apartment.db")
+# Connections per worker process, however many gunicorn threads it runs; each one
+# carries its own page cache and mmap. A thread waits up to POOL_TIMEOUT for one.
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+POOL_TIMEOUT = 5
+
+PRAGMAS = [
+    "PRAGMA busy_timeout=5000",     # wait for the other worker instead of "database is locked"
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",    # safe with WAL, skips an fsync per commit
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # ~8 MB page cache per connection
+    "PRAGMA mmap_size=67108864",
+]
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS tickets
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT,
+        description TEXT,
+        status TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME,
+        rev INTEGER,
+        tier TEXT)''',
+    # Change log behind /tickets/stream; seq doubles as the SSE event id.
+    '''CREATE TABLE IF NOT EXISTS ticket_events
+       (seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id INTEGER,
+        type TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+]
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_tickets_status_id ON tickets(status, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_category_id ON tickets(category, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_updated_at ON tickets(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_rev ON tickets(rev)",
+]
+
+# Statements are module constants so sqlite3's statement cache reuses the prepared form.
+# rev is bumped on every insert/resolve inside the write lock, so it changes even when
+# two updates land in the same second (updated_at alone is too coarse for ETags).
+NEXT_REV = "(SELECT COALESCE(MAX(rev), 0) + 1 FROM tickets)"
+INSERT_TICKET = ("INSERT INTO tickets (category, description, status, tier, updated_at, rev) "
+                 f"VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, {NEXT_REV})")
+RESOLVE_TICKET = f"UPDATE tickets SET status = 'Resolved', updated_at = CURRENT_TIMESTAMP, rev = {NEXT_REV} WHERE id = ?"
+INSERT_EVENT = "INSERT INTO ticket_events (ticket_id, type) VALUES (?, ?)"
+SELECT_EVENTS = ("SELECT e.seq, e.type, t.id, t.category, t.description, t.status, t.created_at "
+                 "FROM ticket_events e JOIN tickets t ON t.id = e.ticket_id "
+                 "WHERE e.seq > ? ORDER BY e.seq LIMIT ?")
+SELECT_EVENT_RANGE = "SELECT MIN(seq), MAX(seq) FROM ticket_events"
+EVENT_LOG_SIZE = 10000
+PRUNE_EVENTS = "DELETE FROM ticket_events WHERE seq <= (SELECT MAX(seq) FROM ticket_events) - ?"
+# Each sub-select is a single index lookup (rowid / idx_tickets_rev / idx_tickets_updated_at).
+SELECT_VERSION = ("SELECT (SELECT MAX(id) FROM tickets), (SELECT MAX(rev) FROM tickets), "
+                  "(SELECT MAX(updated_at) FROM tickets)")
+
+_pool_lock = threading.Lock()
+_pool = None
+_local = threading.local()  # the connection this thread has checked out, if any
+
+
+class ConnectionPool:
+    def __init__(self, path, size):
+        self.path = path
+        self.pid = os.getpid()
+        self._idle = queue.LifoQueue()  # most recently used first: warm page cache
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=POOL_TIMEOUT):
+            raise sqlite3.OperationalError(f"No free database connection after {POOL_TIMEOUT}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return _connect(self.path)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        self._idle.put(conn)
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def connect(path=None):
+    # A fresh connection outside the pool, for callers that keep one for good (e.g. the change-feed poller).
+    return _connect(path or DB_PATH)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None,
+                           check_same_thread=False, cached_statements=128)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid() or _pool.path != DB_PATH:
+            if _pool is not None and _pool.pid == os.getpid():
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH, POOL_SIZE)  # a forked child never reuses the parent's
+        return _pool
+
+
+@contextmanager
+def connection():
+    # Checks a connection out of the pool for the block. Re-entrant: nested calls in the
+    # same thread reuse the connection already held instead of taking a second slot.
+    held = getattr(_local, "held", None)
+    if held is not None and held[0] is _pool and _pool.pid == os.getpid():
+        yield held[1]
+        return
+    pool = _get_pool()
+    conn = pool.acquire()
+    _local.held = (pool, conn)
+    try:
+        yield conn
+    finally:
+        _local.held = None
+        pool.release(conn)
+
+
+def close():
+    # Closes this worker's idle connections (tests switch databases between cases).
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+
+@contextmanager
+def transaction():
+    # BEGIN IMMEDIATE takes the write lock up front, so busy_timeout applies
+    # instead of failing on a read->write lock upgrade.
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def init_db(path=None):
+    global DB_PATH
+    if path:
+        DB_PATH = path
+    with transaction() as conn:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        # Older databases were created before these columns existed.
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(tickets)")]
+        for column, column_type in (("updated_at", "DATETIME"), ("rev", "INTEGER"), ("tier", "TEXT")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE tickets ADD COLUMN {column} {column_type}")
+        for statement in INDEXES:
+            conn.execute(statement)
+        conn.execute("UPDATE tickets SET updated_at = created_at WHERE updated_at IS NULL")
+        conn.execute("UPDATE tickets SET rev = id WHERE rev IS NULL")
+        conn.execute(PRUNE_EVENTS, (EVENT_LOG_SIZE,))
+
+
+# --- Queries ---
+def create_ticket(category, description, status='Open', tier=None):
+    # tier: which classifier tier picked the category (see classifier.py)
+    with metrics.db_timer("create_ticket"), transaction() as conn:
+        ticket_id = conn.execute(INSERT_TICKET, (category, description, status, tier)).lastrowid
+        conn.execute(INSERT_EVENT, (ticket_id, 'created'))
+        return ticket_id
+
+
+def create_tickets(tickets):
+    # Bulk insert of (category, description, status, tier) rows in one transaction.
+    # Returns the new ids; they are consecutive because the write lock is held throughout.
+    if not tickets:
+        return []
+    with metrics.db_timer("create_tickets"), transaction() as conn:
+        conn.executemany(INSERT_TICKET, tickets)
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        ids = list(range(last_id - len(tickets) + 1, last_id + 1))
+        conn.executemany(INSERT_EVENT, [(ticket_id, 'created') for ticket_id in ids])
+        return ids
+
+
+def resolve_ticket(ticket_id):
+    with metrics.db_timer("resolve_ticket"), transaction() as conn:
+        if conn.execute(RESOLVE_TICKET, (ticket_id,)).rowcount == 0:
+            return False
+        conn.execute(INSERT_EVENT, (ticket_id, 'resolved'))
+        return True
+
+
+def list_tickets(before_id=None, limit=None, status=None, category=None, since=None, until=None):
+    # Keyset pagination: newest first, next page starts below the last id seen.
+    where, params = [], []
+    if before_id is not None:
+        where.append("id < ?")
+        params.append(before_id)
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if category:
+        where.append("category = ?")
+        params.append(category)
+    if since:
+        where.append("created_at >= ?")
+        params.append(since)
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+
+    sql = "SELECT * FROM tickets"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with metrics.db_timer("list_tickets"), connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def get_version():
+    # (newest ticket id, latest rev, latest updated_at) - changes whenever a ticket is added or resolved.
+    with metrics.db_timer("get_version"), connection() as conn:
+        return tuple(conn.execute(SELECT_VERSION).fetchone())
+
+
+def events_since(seq, limit=500, conn=None):
+    if conn is not None:
+        return conn.execute(SELECT_EVENTS, (seq, limit)).fetchall()
+    with connection() as conn:
+        return conn.execute(SELECT_EVENTS, (seq, limit)).fetchall()
+
+
+def event_range(conn=None):
+    # (oldest, newest) seq still in the change log; (None, None) when empty.
+    if conn is not None:
+        return tuple(conn.execute(SELECT_EVENT_RANGE).fetchone())
+    with connection() as conn:
+        return tuple(conn.execute(SELECT_EVENT_RANGE).fetchone())